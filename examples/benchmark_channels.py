@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+# measures how fast multi-channel microphone audio can be reduced to the mono audio recognizers use, on synthetic 8- and 16-channel streams
+# usage: python3 benchmark_channels.py [SECONDS_OF_AUDIO]
+
+import sys
+import time
+
+import numpy as np
+
+import speech_recognition as sr
+
+SAMPLE_RATE, SAMPLE_WIDTH, CHUNK = 48000, 2, 1024  # a typical audio interface
+DURATION = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+
+
+class SyntheticStream(object):
+    """Stands in for a PyAudio stream, returning chunks of random ``channels``-channel 16-bit audio."""
+    def __init__(self, channels):
+        self.frame_width = SAMPLE_WIDTH * channels
+        self.audio = np.random.default_rng(0).integers(-3000, 3000, size=SAMPLE_RATE * channels, dtype="<i2").tobytes()  # one second, played in a loop
+        self.position = 0
+
+    def get_read_available(self):
+        return CHUNK
+
+    def read(self, size):
+        start = self.position % len(self.audio)
+        buffer = self.audio[start:start + size * self.frame_width]
+        self.position += len(buffer)
+        return buffer
+
+
+def benchmark(name, channels, read_chunk):
+    """Reads ``DURATION`` seconds of audio in ``CHUNK``-frame chunks with ``read_chunk(stream)`` and prints the throughput."""
+    stream = SyntheticStream(channels)
+    chunk_count = int(DURATION * SAMPLE_RATE / CHUNK)
+    start_time = time.perf_counter()
+    for _ in range(chunk_count): read_chunk(stream)
+    elapsed = time.perf_counter() - start_time
+    input_bytes = chunk_count * CHUNK * stream.frame_width
+    print("{:>2} channels, {}: {:.0f} MB/s of captured audio, {:.0f}x realtime".format(channels, name, input_bytes / elapsed / 1e6, DURATION / elapsed))
+
+
+def select_with_memoryview(channels, channel):
+    """Baseline without NumPy: pick one channel out of the interleaved samples with a strided memoryview."""
+    return lambda stream: memoryview(stream.read(CHUNK)).cast("h")[channel::channels].tobytes()
+
+
+def converted_stream(channels, channel_map, sample_rate=SAMPLE_RATE):
+    """Reads through the same stream wrapper that ``Microphone(channel_map=channel_map)`` uses, optionally also converting to ``sample_rate``."""
+    def read_chunk(stream):
+        if not hasattr(stream, "converted"):
+            converter = sr.FormatConverter(SAMPLE_RATE, SAMPLE_WIDTH, channels, sample_rate, SAMPLE_WIDTH, channel_map)
+            stream.converted = sr.Microphone.ConvertedMicrophoneStream(stream, converter, SAMPLE_WIDTH)
+        return stream.converted.read(CHUNK * sample_rate // SAMPLE_RATE)
+    return read_chunk
+
+
+for channels in (8, 16):
+    benchmark("capture all, downmix in AudioData", channels, lambda stream, channels=channels: sr.AudioData(stream.read(CHUNK), SAMPLE_RATE, SAMPLE_WIDTH, channels))
+    benchmark("select channel 3 with a memoryview (no NumPy)", channels, select_with_memoryview(channels, 3))
+    benchmark("channel_map=[3]", channels, converted_stream(channels, [3]))
+    benchmark("channel_map=[0, 1] (average a stereo pair)", channels, converted_stream(channels, [0, 1]))
+    benchmark("downmix all channels", channels, converted_stream(channels, list(range(channels))))
+    benchmark("downmix all channels, then convert to 16 kHz", channels, converted_stream(channels, list(range(channels)), 16000))
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+# measures how long ``listen`` takes to end each turn of a recorded dialog, with the fixed ``pause_threshold`` and with an ``Endpointer``
+# usage: python3 benchmark_endpointing.py [AUDIO_FILE ...] (defaults to the example recordings in this folder, played one after another as dialog turns)
+
+import io
+import sys
+from os import path
+
+import speech_recognition as sr
+
+TURN_GAP = 2.0  # seconds of silence after each turn, during which the other party would be speaking
+ENERGY_THRESHOLD = 300
+
+audio_files = sys.argv[1:] or [path.join(path.dirname(path.realpath(__file__)), name) for name in ("english.wav", "french.aiff", "chinese.flac")]
+
+# build the dialog from the recordings, and find where speaking ends in each turn to within 10 milliseconds
+SAMPLE_RATE, SAMPLE_WIDTH = 16000, 2
+r = sr.Recognizer()
+dialog, turns = b"", []  # start and end of speaking in each turn, in seconds
+for audio_file in audio_files:
+    with sr.AudioFile(audio_file) as source: frame_data = r.record(source).get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH)
+    energies = sr.audio.get_rms_energies(frame_data, SAMPLE_WIDTH, SAMPLE_RATE // 100)
+    speaking = [i for i, energy in enumerate(energies) if energy > ENERGY_THRESHOLD]
+    offset = len(dialog) // SAMPLE_WIDTH / SAMPLE_RATE
+    if speaking: turns.append((offset + speaking[0] / 100, offset + (speaking[-1] + 1) / 100))
+    dialog += frame_data + b"\x00\x00" * int(TURN_GAP * SAMPLE_RATE)
+wav_data = sr.AudioData(dialog, SAMPLE_RATE, SAMPLE_WIDTH, 1).get_wav_data()
+
+
+def phrase_end_times(endpointer):
+    """Returns the position in the dialog, in seconds, at which each call to ``listen`` returned."""
+    r = sr.Recognizer()
+    r.energy_threshold, r.dynamic_energy_threshold = ENERGY_THRESHOLD, False
+    with sr.AudioFile(io.BytesIO(wav_data)) as source:
+        source.CHUNK = 1024  # a typical microphone chunk size
+        times = []
+        while source.stream.get_read_available() > 0:
+            try:
+                r.listen(source, timeout=TURN_GAP, endpointer=endpointer)
+            except sr.WaitTimeoutError:
+                continue
+            times.append(source.stream.audio_reader.tell() / source.SAMPLE_RATE)
+    return times
+
+
+configurations = (
+    ("fixed pause_threshold", None),
+    ("Endpointer", sr.Endpointer()),
+    ("Endpointer, always committing early", sr.Endpointer(early_commit=lambda endpointer, silence_duration: True)),  # lower bound, as if a caller could always tell the turn was complete
+)
+for name, endpointer in configurations:
+    times = phrase_end_times(endpointer)
+    latencies, early_splits = [], 0
+    for turn_start, turn_end in turns:
+        early_splits += sum(1 for t in times if turn_start < t < turn_end)
+        if any(t >= turn_end for t in times): latencies.append(min(t for t in times if t >= turn_end) - turn_end)
+    print("{}: mean endpoint latency {:.0f} ms over {} turns (max {:.0f} ms), {} phrases ended before the end of a turn".format(
+        name, 1000 * sum(latencies) / max(1, len(latencies)), len(latencies), 1000 * max(latencies or [0]), early_splits
+    ))
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+# measures the latency and real-time factor of ``recognize_whisper`` and ``recognize_faster_whisper`` at several compute types, on the example recordings
+# usage: python3 benchmark_faster_whisper.py [MODEL [CPU_THREADS [AUDIO_FILE ...]]] (defaults to the "base" model, the CTranslate2 default thread count, and the example recordings in this folder and the tests folder)
+# NOTE: this example requires the openai-whisper and faster-whisper packages
+
+import sys
+import time
+from os import path
+
+import speech_recognition as sr
+
+ROUNDS = 3  # times each recording is recognized
+
+examples_dir = path.dirname(path.realpath(__file__))
+model = sys.argv[1] if len(sys.argv) > 1 else "base"
+cpu_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+audio_files = sys.argv[3:] or [
+    path.join(examples_dir, "english.wav"),
+    path.join(examples_dir, "french.aiff"),
+    path.join(examples_dir, "chinese.flac"),
+    path.join(examples_dir, "..", "tests", "english.wav"),
+]
+
+r = sr.Recognizer()
+recordings = []
+for audio_file in audio_files:
+    with sr.AudioFile(audio_file) as source:
+        recordings.append((path.basename(audio_file), r.record(source)))
+
+configurations = [("recognize_whisper", lambda audio: r.recognize_whisper(audio, model=model, load_options={"device": "cpu"}))]
+for compute_type in ("int8", "int16", "float32"):
+    configurations.append(("recognize_faster_whisper, " + compute_type, lambda audio, compute_type=compute_type: r.recognize_faster_whisper(audio, model=model, compute_type=compute_type, cpu_threads=cpu_threads)))
+
+for name, recognize in configurations:
+    recognize(recordings[0][1])  # keep model loading and the first slow forward pass out of the measurements
+    total_time, total_duration = 0, 0
+    for file_name, audio in recordings:
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        start_time = time.perf_counter()
+        for _ in range(ROUNDS): text = recognize(audio)
+        elapsed = (time.perf_counter() - start_time) / ROUNDS
+        total_time, total_duration = total_time + elapsed, total_duration + duration
+        print("{} on {}: {:.0f} ms, {:.2f}x real time: {}".format(name, file_name, 1000 * elapsed, elapsed / duration, text.strip()))
+    print("{}: {:.2f}x real time overall\n".format(name, total_time / total_duration))
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+# measures the per-phrase latency of ``recognize_whisper`` with language detection on every phrase, and with a ``WhisperSession`` that keeps the detected language and carries the transcript over as the prompt
+# usage: python3 benchmark_whisper_session.py [MODEL [AUDIO_FILE ...]] (defaults to the "base" model and the English example recording in this folder)
+# NOTE: this example requires the openai-whisper package
+
+import sys
+import time
+from os import path
+
+import speech_recognition as sr
+
+ROUNDS = 3  # times each recording is played, as consecutive phrases of the same stream
+
+model = sys.argv[1] if len(sys.argv) > 1 else "base"
+audio_files = sys.argv[2:] or [path.join(path.dirname(path.realpath(__file__)), "english.wav")]
+
+r = sr.Recognizer()
+phrases = []
+for audio_file in audio_files:
+    with sr.AudioFile(audio_file) as source:
+        phrases += r.segment(source) or [r.record(source)]
+phrases *= ROUNDS
+r.whisper_model_registry.warmup(model)  # keep model loading and the first slow forward pass out of the measurements
+
+
+def latencies(recognize):
+    """Returns the time taken by ``recognize`` for each phrase, in seconds."""
+    times = []
+    for audio in phrases:
+        start_time = time.perf_counter()
+        recognize(audio)
+        times.append(time.perf_counter() - start_time)
+    return times
+
+
+session = sr.WhisperSession(r, model=model)
+configurations = (
+    ("recognize_whisper, detecting the language of every phrase", lambda audio: r.recognize_whisper(audio, model=model)),
+    ("WhisperSession", session.recognize),
+)
+for name, recognize in configurations:
+    times = latencies(recognize)
+    steady_times = times[len(times) // 2:]  # by then, the session has settled on a language
+    print("{}: mean {:.0f} ms per phrase over {} phrases, {:.0f} ms over the last {}".format(
+        name, 1000 * sum(times) / len(times), len(times), 1000 * sum(steady_times) / len(steady_times), len(steady_times)
+    ))
+print("the session detected the language of {} phrases, and settled on {!r}".format(session.detections, session.language))
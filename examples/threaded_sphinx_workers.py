@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+# like threaded_workers.py, but recognizes offline with CMU Sphinx on one worker thread per CPU core, sharing a pool of PocketSphinx decoders
+# NOTE: this example requires PyAudio because it uses the Microphone class, and PocketSphinx
+
+import os
+from threading import Thread
+from queue import Queue
+
+import speech_recognition as sr
+
+
+worker_count = os.cpu_count() or 1
+r = sr.Recognizer()
+r.sphinx_decoder_cache = sr.SphinxDecoderCache(pool_size=worker_count)  # each worker thread needs its own PocketSphinx decoder to recognize at the same time as the others
+audio_queue = Queue()
+
+
+def recognize_worker():
+    # this runs in a background thread
+    while True:
+        audio = audio_queue.get()  # retrieve the next audio processing job from the main thread
+        if audio is None: break  # stop processing if the main thread is done
+
+        # received audio data, now we'll recognize it using CMU Sphinx
+        try:
+            print("Sphinx thinks you said " + r.recognize_sphinx(audio))
+        except sr.UnknownValueError:
+            print("Sphinx could not understand audio")
+        except sr.RequestError as e:
+            print("Sphinx error; {0}".format(e))
+
+        audio_queue.task_done()  # mark the audio processing job as completed in the queue
+
+
+# start a thread per CPU core to recognize audio, while this thread focuses on listening
+recognize_threads = [Thread(target=recognize_worker) for _ in range(worker_count)]
+for recognize_thread in recognize_threads:
+    recognize_thread.daemon = True
+    recognize_thread.start()
+with sr.Microphone() as source:
+    try:
+        while True:  # repeatedly listen for phrases and put the resulting audio on the audio processing job queue
+            audio_queue.put(r.listen(source))
+    except KeyboardInterrupt:  # allow Ctrl + C to shut down the program
+        pass
+
+audio_queue.join()  # block until all current audio processing jobs are done
+for recognize_thread in recognize_threads: audio_queue.put(None)  # tell each recognize_thread to stop
+for recognize_thread in recognize_threads: recognize_thread.join()  # wait for the recognize_threads to actually stop
+print(r.sphinx_decoder_cache.get_stats())  # how busy the decoders were
@@ -34,7 +34,7 @@ class InstallWithExtraSteps(install):
 setup(
     name="SpeechRecognition",
     version=speech_recognition.__version__,
-    packages=["speech_recognition"],
+    packages=["speech_recognition", "speech_recognition.recognizers"],
     include_package_data=True,
     cmdclass={"install": InstallWithExtraSteps},
 
@@ -1,11 +1,13 @@
 import speech_recognition as sr
 
 r = sr.Recognizer()
-m = sr.Microphone()
+m = sr.Microphone(noise_profile_store=sr.NoiseProfileStore())
 
 try:
-    print("A moment of silence, please...")
-    with m as source: r.adjust_for_ambient_noise(source)
+    with m as source:
+        if r.load_noise_profile(source) is None:  # no saved noise profile for this microphone yet
+            print("A moment of silence, please...")
+            r.adjust_for_ambient_noise(source)
     print("Set minimum energy threshold to {}".format(r.energy_threshold))
     while True:
         print("Say something!")
@@ -1,13 +1,19 @@
 import aifc
 import audioop
+import collections
 import io
 import os
 import platform
 import stat
 import subprocess
 import sys
+import threading
+import time
 import wave
 
+from .exceptions import SetupError
+from .instrumentation import active_metrics
+
 
 class AudioData(object):
     """
@@ -28,13 +34,20 @@ class AudioData(object):
             sample_width % 1 == 0 and 1 <= sample_width <= 4
         ), "Sample width must be between 1 and 4 inclusive"
 
-        if channels != 1:
+        if channels == 2:
             self.frame_data = audioop.tomono(frame_data, sample_width, 1, 1)
+        elif channels > 2:  # ``audioop.tomono`` only supports stereo audio
+            self.frame_data = downmix_channels(frame_data, sample_width, channels)
         else:
             self.frame_data = frame_data
         self.sample_rate = sample_rate
         self.sample_width = int(sample_width)
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["frame_data"] = bytes(self.frame_data)  # the frame data can be a ``memoryview`` (see ``recognizer_instance.segment``), which can't be pickled
+        return state
+
     def get_segment(self, start_ms=None, end_ms=None):
         """
         Returns a new ``AudioData`` instance, trimmed to a given time interval. In other words, an ``AudioData`` instance with the same audio data except starting at ``start_ms`` milliseconds in and ending ``end_ms`` milliseconds in.
@@ -84,6 +97,8 @@ class AudioData(object):
         ), "Sample width to convert to must be between 1 and 4 inclusive"
 
         raw_data = self.frame_data
+        active = active_metrics.get()  # measure the conversion if a recognizer with metrics is running
+        if active is not None: start_time = time.perf_counter()
 
         # make sure unsigned 8-bit audio (which uses unsigned samples) is handled like higher sample width audio (which uses signed samples)
         if self.sample_width == 1:
@@ -136,6 +151,9 @@ class AudioData(object):
                 raw_data, 1, 128
             )  # add 128 to every sample to make them act like unsigned samples again
 
+        if active is not None and (convert_rate not in (None, self.sample_rate) or convert_width not in (None, self.sample_width)):
+            metrics, labels = active
+            metrics.observe("stage_seconds", time.perf_counter() - start_time, stage="convert", **labels)
         return raw_data
 
     def get_wav_data(self, convert_rate=None, convert_width=None):
@@ -234,6 +252,8 @@ class AudioData(object):
 
         # run the FLAC converter with the WAV data to get the FLAC data
         wav_data = self.get_wav_data(convert_rate, convert_width)
+        active = active_metrics.get()  # measure the encoding if a recognizer with metrics is running
+        if active is not None: start_time = time.perf_counter()
         flac_converter = get_flac_converter()
         if (
             os.name == "nt"
@@ -260,9 +280,254 @@ class AudioData(object):
             startupinfo=startup_info,
         )
         flac_data, stderr = process.communicate(wav_data)
+        if active is not None:
+            metrics, labels = active
+            metrics.observe("stage_seconds", time.perf_counter() - start_time, stage="flac_encode", **labels)
+            metrics.increment("bytes_encoded_total", len(flac_data), format="flac", **labels)
         return flac_data
 
 
+def get_rms_energies(frame_data, sample_width, samples_per_frame):
+    """
+    Returns a NumPy array containing the RMS energy of each consecutive group of ``samples_per_frame`` samples in ``frame_data``, computed in a single vectorized pass. These are the same values ``audioop.rms`` gives for each group, except as floats. A trailing partial group is ignored.
+
+    Raises a ``speech_recognition.exceptions.SetupError`` exception if NumPy is not installed.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise SetupError("missing numpy module: ensure that numpy is set up correctly.")
+    assert 1 <= sample_width <= 4, "Sample width must be between 1 and 4 inclusive"
+    assert samples_per_frame > 0, "``samples_per_frame`` must be a positive integer"
+
+    frame_count = len(frame_data) // (sample_width * samples_per_frame)
+    samples = _get_samples(np, frame_data, sample_width, frame_count * samples_per_frame)  # like ``audioop``, treat samples as signed
+    samples = samples.reshape(frame_count, samples_per_frame).astype(np.float64)
+    return np.sqrt(np.einsum("ij,ij->i", samples, samples) / samples_per_frame)
+
+
+def _get_samples(np, frame_data, sample_width, sample_count):
+    """Returns a NumPy array of the first ``sample_count`` samples in ``frame_data``, as signed little-endian integers."""
+    if sample_width == 3:  # NumPy has no 24-bit integer type, so assemble each little-endian sample from its bytes
+        sample_bytes = np.frombuffer(frame_data, dtype=np.uint8, count=sample_count * 3).reshape(-1, 3).astype(np.int32)
+        samples = sample_bytes[:, 0] | (sample_bytes[:, 1] << 8) | (sample_bytes[:, 2] << 16)
+        return np.where(samples >= 1 << 23, samples - (1 << 24), samples)
+    return np.frombuffer(frame_data, dtype="<i{}".format(sample_width), count=sample_count)
+
+
+def downmix_channels(frame_data, sample_width, channels, channel_map=None):
+    """
+    Returns mono audio made from the interleaved ``channels``-channel audio ``frame_data``, by averaging the channels at the indices in ``channel_map`` (all channels if ``None``) with vectorized NumPy operations. If ``channel_map`` has one entry, that channel is extracted as-is. A trailing partial frame is ignored. Like ``AudioData``, 8-bit audio is unsigned and wider audio is signed.
+
+    Unlike ``audioop.tomono``, this works with any number of channels.
+
+    Raises a ``speech_recognition.exceptions.SetupError`` exception if NumPy is not installed.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise SetupError("missing numpy module: ensure that numpy is set up correctly.")
+    assert 1 <= sample_width <= 4, "Sample width must be between 1 and 4 inclusive"
+    assert channels >= 1, "``channels`` must be a positive integer"
+    assert channel_map is None or (len(channel_map) > 0 and all(0 <= channel < channels for channel in channel_map)), "``channel_map`` must be ``None`` or a non-empty sequence of channel indices less than ``channels``"
+
+    frame_count = len(frame_data) // (sample_width * channels)
+    if channel_map is None: channel_map = range(channels)
+    if sample_width == 3:
+        samples = _get_samples(np, frame_data, 3, frame_count * channels)
+    else:  # view the samples in place, so extracting a channel is just a strided copy
+        samples = np.frombuffer(frame_data, dtype=np.uint8 if sample_width == 1 else "<i{}".format(sample_width), count=frame_count * channels)
+    samples = samples.reshape(frame_count, channels)
+    if len(channel_map) == 1 and sample_width != 3: return samples[:, channel_map[0]].tobytes()
+
+    # add up the channels one column at a time, which is faster than reducing along the rows of the interleaved samples
+    mono = samples[:, channel_map[0]].astype(np.int32 if sample_width <= 2 else np.int64)
+    for channel in channel_map[1:]: mono += samples[:, channel]
+    mono //= len(channel_map)  # the mean of the samples always fits in the sample width
+    if sample_width == 1: return mono.astype(np.uint8).tobytes()  # unsigned samples average the same way as signed ones
+    if sample_width == 3: return mono.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()  # keep the low 3 bytes of each little-endian 32-bit sample
+    return mono.astype("<i{}".format(sample_width)).tobytes()
+
+
+NoiseCalibration = collections.namedtuple("NoiseCalibration", ["noise_floor", "spread", "peak", "energy_threshold"])
+NoiseCalibration.__doc__ = """
+Result of a percentile-based noise calibration, as returned by ``recognizer_instance.adjust_for_ambient_noise(source, method="percentile")``.
+
+``noise_floor`` is the median chunk energy, ``spread`` is how much the chunk energies typically vary around it (the median absolute deviation, scaled to be comparable to a standard deviation), ``peak`` is the highest chunk energy, and ``energy_threshold`` is the suggested energy threshold.
+"""
+
+
+def calibrate_noise_floor(frame_data, sample_width, samples_per_frame, energy_ratio=1.5, spread_factor=3.0):
+    """
+    Computes a ``NoiseCalibration`` from the chunk energies of ``frame_data``, which should be audio without speech, split into chunks of ``samples_per_frame`` samples.
+
+    Since the noise floor and spread are medians, short loud sounds like a cough or a door closing barely affect them. The suggested energy threshold is the larger of ``energy_ratio`` times the noise floor and the noise floor plus ``spread_factor`` times the spread.
+
+    Raises a ``speech_recognition.exceptions.SetupError`` exception if NumPy is not installed.
+    """
+    energies = get_rms_energies(frame_data, sample_width, samples_per_frame)  # raises a ``SetupError`` if NumPy is missing, so it's safe to import below
+    import numpy as np
+
+    assert len(energies) > 0, "``frame_data`` must contain at least one full chunk of audio"
+    noise_floor = float(np.median(energies))
+    spread = 1.4826 * float(np.median(np.abs(energies - noise_floor)))
+    energy_threshold = max(noise_floor * energy_ratio, noise_floor + spread_factor * spread)
+    return NoiseCalibration(noise_floor, spread, float(energies.max()), energy_threshold)
+
+
+class RingBuffer(object):
+    """
+    Creates a new ``RingBuffer`` instance, a fixed-size first-in first-out byte buffer with room for ``capacity`` bytes, for passing audio from one producer thread to one consumer thread.
+
+    All memory is allocated up front, and neither side takes a lock: the producer only ever advances the write position and the consumer only ever advances the read position. This makes ``ring_buffer_instance.write`` safe to call from audio callbacks that must not block.
+
+    If the producer writes more than there is room for, the data that doesn't fit is dropped and ``ring_buffer_instance.overruns`` is incremented (``ring_buffer_instance.dropped_bytes`` counts the bytes lost). If the consumer asks for more than is available, it waits for the producer, counted in ``ring_buffer_instance.waits`` and ``ring_buffer_instance.wait_seconds``. A blocking consumer that keeps up with the producer waits on most reads, so these measure how long it sits idle. Only reads that time out before enough data arrives are starved of audio, and those are counted in ``ring_buffer_instance.underruns``.
+    """
+    def __init__(self, capacity):
+        assert isinstance(capacity, int) and capacity > 0, "``capacity`` must be a positive integer"
+        self.capacity = capacity
+        self._buffer = bytearray(capacity)
+        self._write_count = 0  # total number of bytes ever written, only changed by the producer
+        self._read_count = 0  # total number of bytes ever read, only changed by the consumer
+        self._data_written = threading.Event()
+        self.overruns, self.dropped_bytes, self.underruns = 0, 0, 0
+        self.waits, self.wait_seconds = 0, 0.0
+        self.closed = False
+
+    def available(self):
+        """Returns the number of bytes that can be read without waiting."""
+        return self._write_count - self._read_count
+
+    def write(self, data):
+        """
+        Appends the bytes-like object ``data`` to the buffer, dropping whatever doesn't fit. Never blocks. Returns the number of bytes written.
+        """
+        data = memoryview(data).cast("B")
+        size = min(len(data), self.capacity - (self._write_count - self._read_count))
+        if size < len(data):
+            self.overruns += 1
+            self.dropped_bytes += len(data) - size
+
+        start = self._write_count % self.capacity
+        first_part = min(size, self.capacity - start)  # the write might wrap around the end of the buffer
+        self._buffer[start:start + first_part] = data[:first_part]
+        self._buffer[:size - first_part] = data[first_part:size]
+        self._write_count += size
+        self._data_written.set()
+        return size
+
+    def readinto(self, buffer, timeout=None):
+        """
+        Fills the writable bytes-like object ``buffer`` with the oldest data in the ring buffer, waiting up to ``timeout`` seconds (forever if ``None``) for enough data to arrive.
+
+        Returns the number of bytes read, which is less than ``len(buffer)`` only if the wait timed out or the buffer was closed.
+        """
+        view = memoryview(buffer).cast("B")
+        if self.available() < len(view) and not self.closed:
+            self.waits += 1
+            wait_start_time = time.monotonic()
+            deadline = None if timeout is None else wait_start_time + timeout
+            while self.available() < len(view) and not self.closed:
+                self._data_written.clear()
+                if self.available() >= len(view): break  # data arrived before the event was cleared
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0: break
+                self._data_written.wait(remaining)
+            self.wait_seconds += time.monotonic() - wait_start_time
+
+        size = min(len(view), self.available())
+        if size < len(view) and not self.closed: self.underruns += 1  # timed out, rather than reaching the end of a closed buffer
+        start = self._read_count % self.capacity
+        first_part = min(size, self.capacity - start)  # the read might wrap around the end of the buffer
+        view[:first_part] = self._buffer[start:start + first_part]
+        view[first_part:size] = self._buffer[:size - first_part]
+        self._read_count += size
+        return size
+
+    def read(self, size, timeout=None):
+        """Returns up to ``size`` bytes from the buffer as a ``bytes`` object, waiting in the same way as ``ring_buffer_instance.readinto``."""
+        buffer = bytearray(size)
+        return bytes(memoryview(buffer)[:self.readinto(buffer, timeout)])
+
+    def close(self):
+        """Marks the buffer as closed, waking up any waiting reader. Data already in the buffer can still be read."""
+        self.closed = True
+        self._data_written.set()
+
+
+class AudioFormatRequirements(collections.namedtuple("AudioFormatRequirements", ["sample_rates", "min_sample_rate", "max_sample_rate", "sample_widths"], defaults=(None, None, None, None))):
+    """
+    Describes the audio formats a speech recognition engine accepts, as found in ``Recognizer.format_requirements``.
+
+    ``sample_rates`` is a tuple of the accepted sample rates in Hertz, or ``None`` if any sample rate between ``min_sample_rate`` and ``max_sample_rate`` (either of which may be ``None`` for no limit) is accepted. ``sample_widths`` is a tuple of the accepted sample widths in bytes, or ``None`` if any sample width is accepted. Audio in any other format is converted to the first entry of ``sample_rates`` or ``sample_widths``, or has its sample rate clamped into range.
+    """
+    __slots__ = ()
+
+    def get_target_format(self, sample_rate, sample_width):
+        """
+        Returns a ``(sample_rate, sample_width)`` tuple for the format that audio with the given sample rate and sample width has to be converted to. This is the given format if it's already accepted.
+        """
+        if self.sample_rates is not None and sample_rate not in self.sample_rates:
+            sample_rate = self.sample_rates[0]
+        if self.min_sample_rate is not None:
+            sample_rate = max(sample_rate, self.min_sample_rate)
+        if self.max_sample_rate is not None:
+            sample_rate = min(sample_rate, self.max_sample_rate)
+        if self.sample_widths is not None and sample_width not in self.sample_widths:
+            sample_width = self.sample_widths[0]
+        return sample_rate, sample_width
+
+    def get_conversion(self, audio_data):
+        """
+        Returns a dictionary of the ``convert_rate`` and ``convert_width`` arguments that make ``audio_data.get_raw_data`` (or ``get_wav_data``, ``get_flac_data``, and so on) return audio in an accepted format. Each argument is ``None`` if no conversion is needed, so audio that was already captured in an accepted format is returned as-is.
+        """
+        sample_rate, sample_width = self.get_target_format(audio_data.sample_rate, audio_data.sample_width)
+        return {
+            "convert_rate": None if sample_rate == audio_data.sample_rate else sample_rate,
+            "convert_width": None if sample_width == audio_data.sample_width else sample_width,
+        }
+
+
+class FormatConverter(object):
+    """
+    Creates a new ``FormatConverter`` instance, which incrementally converts a stream of audio with the given ``sample_rate``, ``sample_width``, and ``channels`` into audio with a sample rate of ``convert_rate`` and a sample width of ``convert_width``, one chunk at a time.
+
+    The resampler state is carried over from one chunk to the next, so converting a stream chunk by chunk gives the same audio as converting it all at once, without clicks at the chunk boundaries. Like ``AudioData``, 8-bit audio is unsigned and wider audio is signed.
+
+    If ``channel_map`` is not ``None``, the audio is first downmixed to mono from the channels at those indices with ``downmix_channels``, which requires NumPy, so the rest of the conversion only processes one channel.
+    """
+    def __init__(self, sample_rate, sample_width, channels, convert_rate, convert_width, channel_map=None):
+        assert sample_rate > 0 and convert_rate > 0, "Sample rates must be positive integers"
+        assert 1 <= sample_width <= 4 and 1 <= convert_width <= 4, "Sample widths must be between 1 and 4 inclusive"
+        assert channel_map is None or (len(channel_map) > 0 and all(0 <= channel < channels for channel in channel_map)), "``channel_map`` must be ``None`` or a non-empty sequence of channel indices less than ``channels``"
+        self.sample_rate, self.sample_width, self.channels = sample_rate, sample_width, channels
+        self.convert_rate, self.convert_width = convert_rate, convert_width
+        self.channel_map = None if channel_map is None else list(channel_map)
+        self.output_channels = channels if channel_map is None else 1
+        self._ratecv_state = None
+
+    def convert(self, frame_data):
+        """Returns the next chunk of converted audio, for the next chunk of audio ``frame_data``."""
+        if self.channel_map is not None:
+            frame_data = downmix_channels(frame_data, self.sample_width, self.channels, self.channel_map)
+        if self.sample_width == 1:
+            frame_data = audioop.bias(frame_data, 1, -128)  # subtract 128 from every sample to make them act like signed samples
+        if self.sample_rate != self.convert_rate:
+            frame_data, self._ratecv_state = audioop.ratecv(
+                frame_data,
+                self.sample_width,
+                self.output_channels,
+                self.sample_rate,
+                self.convert_rate,
+                self._ratecv_state,
+            )
+        if self.sample_width != self.convert_width:
+            frame_data = audioop.lin2lin(frame_data, self.sample_width, self.convert_width)
+        if self.convert_width == 1:
+            frame_data = audioop.bias(frame_data, 1, 128)  # add 128 to every sample to make them act like unsigned samples again
+        return frame_data
+
+
 def get_flac_converter():
     """Returns the absolute path of a FLAC converter executable, or raises an OSError if none can be found."""
     flac_converter = shutil_which("flac")  # check for installed version first
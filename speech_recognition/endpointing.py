@@ -0,0 +1,106 @@
+import collections
+
+from .audio import get_rms_energies
+
+
+class Endpointer(object):
+    """
+    Creates a new ``Endpointer`` instance, which decides when a phrase has ended for ``recognizer_instance.listen(source, endpointer=endpointer)``, with lower latency than the fixed chunk-based ``recognizer_instance.pause_threshold``.
+
+    Audio is classified as speaking or non-speaking in frames of ``frame_duration`` seconds (10 milliseconds by default), rather than in whole chunks, so the end of speech is located to within one frame and the phrase can end in the middle of a chunk.
+
+    The pause that ends a phrase adapts to the speaker's rate of speech. It starts at ``pause_threshold`` seconds, and once the speaker has paused between words (for at least ``min_gap`` seconds), it becomes ``gap_factor`` times the longest of their recent pauses, so fast speakers with short pauses are cut off sooner. If the speech before the pause was markedly quieter than the earlier speech in the phrase, as it usually is at the end of a sentence, the pause is multiplied by ``falling_energy_factor``. The pause is never shorter than ``min_pause`` or longer than ``pause_threshold`` seconds.
+
+    If ``early_commit`` is not ``None``, it is called as ``early_commit(endpointer_instance, silence_duration)`` once per chunk whenever there have been at least ``min_pause`` seconds of non-speaking audio. If it returns a truthy value, the phrase ends immediately. This lets callers finalize sooner using their own knowledge, such as a partial transcription that forms a complete command.
+
+    During and after each phrase, ``endpointer_instance.speech_duration`` is the number of seconds of speaking audio, ``endpointer_instance.phrase_duration`` is the number of seconds from the start of the phrase audio passed to the endpointer to the end of the speaking audio, and ``endpointer_instance.pause_duration`` is the pause that would currently end the phrase. Requires NumPy.
+    """
+    def __init__(self, pause_threshold=0.8, min_pause=0.5, min_gap=0.05, frame_duration=0.01, gap_factor=3.0, falling_energy_factor=0.7, early_commit=None):
+        assert 0 < min_pause <= pause_threshold, "``min_pause`` must be a positive number no greater than ``pause_threshold``"
+        assert 0 < frame_duration <= min_gap <= min_pause, "``frame_duration`` and ``min_gap`` must be positive numbers no greater than ``min_pause``, with ``frame_duration`` no greater than ``min_gap``"
+        assert gap_factor > 0 and falling_energy_factor > 0, "``gap_factor`` and ``falling_energy_factor`` must be positive numbers"
+        assert early_commit is None or callable(early_commit), "``early_commit`` must be ``None`` or a callable"
+        self.pause_threshold = pause_threshold
+        self.min_pause = min_pause
+        self.min_gap = min_gap
+        self.frame_duration = frame_duration
+        self.gap_factor = gap_factor
+        self.falling_energy_factor = falling_energy_factor
+        self.early_commit = early_commit
+        self.reset(16000, 2)
+
+    def reset(self, sample_rate, sample_width, channels=1):
+        """
+        Prepares for a new phrase in audio with the given sample rate, sample width, and channel count. The phrase is assumed to have just started.
+        """
+        self.frame_samples = max(1, int(round(sample_rate * self.frame_duration)))
+        self.sample_width, self.channels = sample_width, channels
+        self.frame_bytes = self.frame_samples * sample_width * channels
+        self.seconds_per_frame = float(self.frame_samples) / sample_rate
+
+        self._pending = b""  # partial frame left over from the previous chunk
+        self.bytes_processed = 0  # bytes of audio passed to ``process``, including any in ``self._pending``
+        self.speech_end = 0  # byte offset just after the last speaking frame
+        self.speech_frames, self.silence_frames = 0, 0
+        self.gaps = collections.deque(maxlen=5)  # durations of the speaker's most recent pauses between words, in seconds
+        self.burst_energies = []  # mean energy of each stretch of speaking audio in the phrase so far
+        self.burst_energy, self.burst_frames = 0, 0  # total energy and frame count of the current stretch of speaking audio
+        self.falling_energy = False
+
+    @property
+    def speech_duration(self):
+        return self.speech_frames * self.seconds_per_frame
+
+    @property
+    def phrase_duration(self):
+        """Number of seconds from the start of the audio passed to ``process`` to the end of the last speaking frame, including pauses between words."""
+        return self.speech_end // self.frame_bytes * self.seconds_per_frame
+
+    @property
+    def trailing_bytes(self):
+        """Number of bytes of non-speaking audio at the end of the audio processed so far, which should be trimmed off the phrase."""
+        return self.bytes_processed - self.speech_end
+
+    @property
+    def pause_duration(self):
+        pause = self.pause_threshold
+        if self.gaps: pause = self.gap_factor * max(self.gaps)
+        if self.falling_energy: pause *= self.falling_energy_factor
+        return min(self.pause_threshold, max(self.min_pause, pause))
+
+    def process(self, buffer, energy_threshold):
+        """
+        Processes the next chunk of audio of the phrase, ``buffer``, where audio with an energy above ``energy_threshold`` is considered speaking.
+
+        Returns ``True`` if the phrase has ended, in which case ``endpointer_instance.trailing_bytes`` bytes should be removed from the end of the phrase audio, and ``False`` otherwise.
+        """
+        data = self._pending + buffer if self._pending else buffer
+        frame_count = len(data) // self.frame_bytes
+        self._pending = data[frame_count * self.frame_bytes:]
+        offset = self.bytes_processed - (len(data) - len(buffer))  # byte offset of the start of ``data``
+        self.bytes_processed += len(buffer)
+
+        for i, energy in enumerate(get_rms_energies(data, self.sample_width, self.frame_samples * self.channels).tolist()):
+            if energy > energy_threshold:
+                gap = self.silence_frames * self.seconds_per_frame
+                if gap >= self.min_gap and self.speech_frames > 0:  # speaking resumed after a pause between words
+                    self.gaps.append(gap)
+                self.silence_frames = 0
+                self.speech_frames += 1
+                self.speech_end = offset + (i + 1) * self.frame_bytes
+                self.burst_energy += energy
+                self.burst_frames += 1
+                continue
+
+            self.silence_frames += 1
+            if self.burst_frames > 0:  # a pause just started, check whether the speech was trailing off compared to the rest of the phrase
+                self.burst_energies.append(self.burst_energy / self.burst_frames)
+                self.burst_energy, self.burst_frames = 0, 0
+                if len(self.burst_energies) >= 2:
+                    earlier_energies = self.burst_energies[:-1]
+                    self.falling_energy = self.burst_energies[-1] < 0.5 * sum(earlier_energies) / len(earlier_energies)
+            if self.silence_frames * self.seconds_per_frame >= self.pause_duration: return True
+
+        silence_duration = self.silence_frames * self.seconds_per_frame
+        if self.early_commit is not None and silence_duration >= self.min_pause and self.early_commit(self, silence_duration): return True
+        return False
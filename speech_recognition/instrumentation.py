@@ -0,0 +1,133 @@
+import contextlib
+import contextvars
+import json
+import logging
+import threading
+import time
+
+active_metrics = contextvars.ContextVar("active_metrics", default=None)  # ``(metrics, labels)`` for the stage being measured by ``Metrics.measure``, if any
+
+
+class Metrics(object):
+    """
+    Creates a new ``Metrics`` instance, which collects counters, gauges, and timing histograms from the capture-to-transcript pipeline. Assign it to ``recognizer_instance.metrics`` to start collecting; when ``recognizer_instance.metrics`` is ``None`` (the default), nothing is measured and the only overhead is a ``None`` check.
+
+    Each metric has a name and a set of string labels. Stage timings are recorded in the ``stage_seconds`` histogram, labelled by ``stage`` (``"stream_read"``, ``"vad"``, ``"convert"``, ``"flac_encode"``, ``"encode"``, ``"http_request"``, ``"parse"``, or ``"decode"``) and, for recognition stages, by ``engine``. Histogram buckets are upper bounds in seconds, given by ``buckets``.
+
+    Every measurement is also passed to each function added with ``metrics_instance.add_hook(hook)``, as a dictionary with the keys ``"type"`` (``"counter"``, ``"gauge"``, or ``"histogram"``), ``"name"``, ``"value"``, ``"labels"``, and ``"time"`` (a Unix timestamp). Hooks are called on the thread doing the work, so they should be fast. ``StructuredLogHook`` is a hook that logs each measurement as JSON.
+
+    Instances are thread-safe.
+    """
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        assert len(buckets) > 0 and list(buckets) == sorted(buckets), "``buckets`` must be a non-empty sorted sequence of numbers"
+        self.buckets = tuple(buckets)
+        self.hooks = []
+        self._lock = threading.Lock()
+        self.counters, self.gauges, self.histograms = {}, {}, {}  # keyed by ``(name, labels)``, where ``labels`` is a sorted tuple of ``(label, value)`` pairs; histograms are ``[bucket_counts, sum, count]``
+
+    def add_hook(self, hook):
+        """Calls ``hook(event)`` for every measurement from now on."""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def _emit(self, metric_type, name, value, labels):
+        event = {"type": metric_type, "name": name, "value": value, "labels": labels, "time": time.time()}
+        for hook in self.hooks: hook(event)
+
+    def increment(self, name, value=1, **labels):
+        """Adds ``value`` to the counter ``name``."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        if self.hooks: self._emit("counter", name, value, labels)
+
+    def set_gauge(self, name, value, **labels):
+        """Sets the gauge ``name`` to ``value``."""
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+        if self.hooks: self._emit("gauge", name, value, labels)
+
+    def observe(self, name, value, **labels):
+        """Adds ``value`` to the histogram ``name``."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None: histogram = self.histograms[key] = [[0] * len(self.buckets), 0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+        if self.hooks: self._emit("histogram", name, value, labels)
+
+    @contextlib.contextmanager
+    def measure(self, stage, **labels):
+        """
+        Context manager that records how long its body takes in the ``stage_seconds`` histogram, labelled with ``stage`` and ``labels``. Audio conversion and FLAC encoding done by ``AudioData`` inside the body are recorded as their own stages, with the same labels.
+        """
+        token = active_metrics.set((self, labels))
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start_time, stage=stage, **labels)
+            active_metrics.reset(token)
+
+    def reset(self):
+        """Discards all measurements collected so far."""
+        with self._lock:
+            self.counters, self.gauges, self.histograms = {}, {}, {}
+
+    def to_prometheus(self, prefix="speech_recognition_"):
+        """
+        Returns the measurements collected so far in the `Prometheus text exposition format <https://prometheus.io/docs/instrumenting/exposition_formats/>`__, with each metric name prefixed by ``prefix``. Serve this from an HTTP endpoint to let Prometheus scrape it.
+        """
+        def format_labels(labels, extra=()):
+            labels = tuple(labels) + tuple(extra)
+            if not labels: return ""
+            return "{" + ",".join('{}="{}"'.format(label, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for label, value in labels) + "}"
+
+        with self._lock:
+            counters, gauges = sorted(self.counters.items()), sorted(self.gauges.items())
+            histograms = sorted((key, (list(bucket_counts), total, count)) for key, (bucket_counts, total, count) in self.histograms.items())
+        lines, declared = [], set()
+        for metric_type, metrics in (("counter", counters), ("gauge", gauges)):
+            for (name, labels), value in metrics:
+                if name not in declared:
+                    lines.append("# TYPE {}{} {}".format(prefix, name, metric_type))
+                    declared.add(name)
+                lines.append("{}{}{} {}".format(prefix, name, format_labels(labels), value))
+        for (name, labels), (bucket_counts, total, count) in histograms:
+            if name not in declared:
+                lines.append("# TYPE {}{} histogram".format(prefix, name))
+                declared.add(name)
+            cumulative_count = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative_count += bucket_count
+                lines.append("{}{}_bucket{} {}".format(prefix, name, format_labels(labels, [("le", repr(float(bound)))]), cumulative_count))
+            lines.append("{}{}_bucket{} {}".format(prefix, name, format_labels(labels, [("le", "+Inf")]), count))
+            lines.append("{}{}_sum{} {}".format(prefix, name, format_labels(labels), total))
+            lines.append("{}{}_count{} {}".format(prefix, name, format_labels(labels), count))
+        return "\n".join(lines) + "\n"
+
+
+class StructuredLogHook(object):
+    """
+    Creates a new ``StructuredLogHook`` instance, a ``Metrics`` hook that logs each measurement as a single-line JSON object to ``logger`` (the ``speech_recognition.metrics`` logger if ``None``) at level ``level``, for log-based dashboards.
+
+    If ``names`` is not ``None``, only measurements with those metric names are logged. Per-chunk measurements like ``audio_energy`` are frequent, so it is often useful to leave them out.
+    """
+    def __init__(self, logger=None, level=logging.INFO, names=None):
+        self.logger = logging.getLogger("speech_recognition.metrics") if logger is None else logger
+        self.level = level
+        self.names = None if names is None else frozenset(names)
+
+    def __call__(self, event):
+        if self.names is not None and event["name"] not in self.names: return
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps(event, sort_keys=True))
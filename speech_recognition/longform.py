@@ -0,0 +1,96 @@
+import collections
+import re
+
+from .audio import get_rms_energies
+
+
+def find_chunk_boundaries(audio_data, energy_threshold, max_chunk_duration=30, min_silence_duration=0.3, overlap=1, frame_duration=0.01):
+    """
+    Returns a list of ``(start, end)`` tuples giving the boundaries in seconds of chunks of ``audio_data`` (an ``AudioData`` instance) no longer than ``max_chunk_duration`` seconds each, for recognizing long recordings a chunk at a time.
+
+    Chunks are cut in the middle of the longest pause in the second half of each ``max_chunk_duration`` seconds of audio, where a pause is at least ``min_silence_duration`` seconds of audio with an energy at or below ``energy_threshold`` (measured over frames of ``frame_duration`` seconds), so words aren't split between chunks. If there is no such pause, the chunk is cut at its maximum length instead, and the next chunk starts ``overlap`` seconds before the cut, so a word that was split can be recognized whole in one of them.
+
+    Requires NumPy.
+    """
+    assert max_chunk_duration > 0, "``max_chunk_duration`` must be a positive number"
+    assert 0 <= overlap < max_chunk_duration / 2, "``overlap`` must be a non-negative number less than half of ``max_chunk_duration``"
+    assert min_silence_duration >= 0 and frame_duration > 0, "``min_silence_duration`` must be a non-negative number and ``frame_duration`` must be a positive number"
+    samples_per_frame = max(1, int(round(audio_data.sample_rate * frame_duration)))
+    seconds_per_frame = float(samples_per_frame) / audio_data.sample_rate
+    silent = (get_rms_energies(audio_data.frame_data, audio_data.sample_width, samples_per_frame) <= energy_threshold).tolist()
+    total_duration = float(len(audio_data.frame_data) // audio_data.sample_width) / audio_data.sample_rate
+    max_frames = max(1, int(max_chunk_duration / seconds_per_frame))
+    min_silence_frames = max(1, int(round(min_silence_duration / seconds_per_frame)))
+    overlap_frames = int(round(overlap / seconds_per_frame))
+
+    boundaries, start = [], 0
+    while total_duration - start * seconds_per_frame > max_chunk_duration:
+        # find the longest pause in the second half of the longest possible chunk, so chunks are never much shorter than the maximum
+        window_start, window_end = start + max_frames // 2, start + max_frames
+        best_start, best_length = None, 0
+        i = window_start
+        while i < window_end:
+            if not silent[i]:
+                i += 1
+                continue
+            run_start = i
+            while i < window_end and silent[i]: i += 1
+            if i - run_start > best_length: best_start, best_length = run_start, i - run_start
+        if best_length >= min_silence_frames:
+            cut = best_start + best_length // 2
+            boundaries.append((start * seconds_per_frame, cut * seconds_per_frame))
+            start = cut
+        else:  # no pause to cut at, so overlap the next chunk with this one
+            boundaries.append((start * seconds_per_frame, window_end * seconds_per_frame))
+            start = window_end - overlap_frames
+    boundaries.append((start * seconds_per_frame, total_duration))
+    return boundaries
+
+
+def _normalize_words(text):
+    return [re.sub(r"[^\w']", "", word.lower()) for word in text.split()]
+
+
+def _remove_repeated_words(previous_text, text, max_words=20):
+    """Returns ``text`` without its first words if they repeat the last words of ``previous_text``, as happens when a word at the end of one chunk is recognized again at the start of the overlapping next chunk."""
+    previous_words, words = _normalize_words(previous_text)[-max_words:], _normalize_words(text)
+    for count in range(min(len(previous_words), len(words)), 0, -1):
+        if previous_words[-count:] == words[:count]:
+            remaining = text.split()[count:]
+            return " " + " ".join(remaining) if remaining else ""
+    return text
+
+
+def stitch_transcriptions(results, boundaries):
+    """
+    Combines the Whisper transcription results ``results`` (dictionaries like those returned by ``recognizer_instance.recognize_whisper(audio_data, show_dict=True)``) of the chunks of audio given by ``boundaries`` (as returned by ``find_chunk_boundaries``) into a single result for the whole audio.
+
+    Segment timestamps (and word timestamps, if any) are shifted to be relative to the start of the whole audio. Where two chunks overlap, segments of the earlier chunk are kept up to the middle of the overlap, and segments of the later chunk after it, and words that were recognized in both chunks are only kept once.
+
+    Returns a dictionary with the keys ``"text"``, ``"segments"``, and ``"language"`` (the language detected in most chunks).
+    """
+    segments, languages = [], collections.Counter()
+    for index, (result, (start, end)) in enumerate(zip(results, boundaries)):
+        if result.get("language"): languages[result["language"]] += 1
+        overlap_start = None if index == 0 else (start + boundaries[index - 1][1]) / 2  # middle of the overlap with the previous chunk
+        overlap_end = None if index + 1 == len(boundaries) else (boundaries[index + 1][0] + end) / 2  # middle of the overlap with the next chunk
+        chunk_segments = result.get("segments")
+        if chunk_segments is None: chunk_segments = [{"start": 0, "end": end - start, "text": result["text"]}]
+        for segment in chunk_segments:
+            segment = dict(segment, start=segment["start"] + start, end=segment["end"] + start)
+            if overlap_start is not None and start < overlap_start and segment["end"] <= overlap_start: continue  # recognized by the previous chunk
+            if overlap_end is not None and boundaries[index + 1][0] < end and segment["start"] >= overlap_end: continue  # recognized by the next chunk
+            if "words" in segment: segment["words"] = [dict(word, start=word["start"] + start, end=word["end"] + start) for word in segment["words"]]
+            if segments and index > 0 and segment["start"] < boundaries[index - 1][1]:  # in the overlap, so its first words may have been recognized by the previous chunk too
+                text = _remove_repeated_words(segments[-1]["text"], segment["text"])
+                if text != segment["text"]:
+                    if "words" in segment: segment["words"] = segment["words"][len(segment["text"].split()) - len(text.split()):]
+                    segment["text"] = text
+                if not text.strip(): continue
+            segments.append(segment)
+    for i, segment in enumerate(segments): segment["id"] = i
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": languages.most_common(1)[0][0] if languages else None,
+    }
@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class NoiseProfileStore(object):
+    """
+    Creates a new ``NoiseProfileStore`` instance, which keeps the calibrated energy threshold and noise statistics of each audio device in a JSON file at ``path``, so they don't have to be recalibrated every time a program starts.
+
+    If ``path`` is ``None``, the file is ``speech_recognition/noise_profiles.json`` inside the user's cache directory (``$XDG_CACHE_HOME``, or ``~/.cache`` if that isn't set).
+
+    Profiles are keyed by device name, device index, and sample rate (see ``NoiseProfileStore.get_key``). Each profile is a dictionary with the keys ``"energy_threshold"``, ``"noise_floor"``, ``"spread"``, ``"peak"``, and ``"updated"`` (a Unix timestamp).
+
+    When ``recognizer_instance.listen`` is used with a source that has a store, the silence it hears before each phrase is used to refresh that source's profile in a background thread, at most once every ``refresh_interval`` seconds.
+
+    Writes replace the file atomically, so a crash or a concurrent reader never sees a partially written file. Instances are thread-safe.
+    """
+    def __init__(self, path=None, refresh_interval=60):
+        assert isinstance(refresh_interval, (int, float)) and refresh_interval >= 0, "``refresh_interval`` must be a non-negative number"
+        if path is None:
+            cache_directory = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            path = os.path.join(cache_directory, "speech_recognition", "noise_profiles.json")
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._profiles, self._profiles_mtime = {}, None
+
+    @staticmethod
+    def get_key(device_name, device_index, sample_rate):
+        """Returns the key of the profile for the device named ``device_name`` at index ``device_index`` (``None`` for the default device), recording at ``sample_rate`` Hz."""
+        return "{}|{}|{}".format(device_name, "default" if device_index is None else device_index, sample_rate)
+
+    def _load(self):
+        """Reloads the profiles from disk if the file has changed since it was last read. Must be called while holding ``self._lock``."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:  # no profiles saved yet
+            self._profiles, self._profiles_mtime = {}, None
+            return
+        if mtime == self._profiles_mtime: return
+        try:
+            with open(self.path, "r") as f:
+                profiles = json.load(f)
+        except (OSError, ValueError):  # unreadable or corrupted file, start over
+            profiles = {}
+        self._profiles, self._profiles_mtime = profiles if isinstance(profiles, dict) else {}, mtime
+
+    def get(self, key):
+        """Returns the profile stored under ``key``, or ``None`` if there isn't one."""
+        with self._lock:
+            self._load()
+            profile = self._profiles.get(key)
+            return dict(profile) if isinstance(profile, dict) else None
+
+    def put(self, key, calibration):
+        """
+        Stores ``calibration`` (a ``NoiseCalibration`` instance, such as the one returned by ``recognizer_instance.adjust_for_ambient_noise(source, method="percentile")``) under ``key``, and returns the stored profile.
+        """
+        profile = {
+            "energy_threshold": calibration.energy_threshold,
+            "noise_floor": calibration.noise_floor,
+            "spread": calibration.spread,
+            "peak": calibration.peak,
+            "updated": time.time(),
+        }
+        with self._lock:
+            self._load()  # pick up profiles written by other processes before rewriting the file
+            profiles = dict(self._profiles)
+            profiles[key] = profile
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".noise_profiles-", suffix=".tmp")
+            try:
+                with os.fdopen(file_descriptor, "w") as f:
+                    json.dump(profiles, f, indent=2, sort_keys=True)
+                os.replace(temporary_path, self.path)
+            except BaseException:
+                os.unlink(temporary_path)
+                raise
+            self._profiles, self._profiles_mtime = profiles, os.stat(self.path).st_mtime_ns
+        return dict(profile)
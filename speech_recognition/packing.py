@@ -0,0 +1,136 @@
+import concurrent.futures
+import threading
+import time
+
+from .audio import AudioData
+from .exceptions import RequestError
+
+
+class _PendingPhrase(object):
+    def __init__(self, frame_data, submit_time):
+        self.frame_data = frame_data  # 16 kHz 16-bit mono audio
+        self.duration = len(frame_data) / 32000.0
+        self.submit_time = submit_time
+        self.future = concurrent.futures.Future()
+
+
+def split_packed_transcription(result, phrase_spans):
+    """
+    Returns the transcription of each phrase packed into one recognition, given the Whisper transcription result ``result`` (a dictionary like those returned by ``recognizer_instance.recognize_whisper(audio_data, show_dict=True)``) of the packed audio and the ``(start, end)`` time span of each phrase in it, in seconds.
+
+    Each segment is assigned to the phrase containing its midpoint, or to the nearest phrase if its midpoint falls in the silence between phrases. Segments with word timestamps have each of their words assigned separately instead, in case Whisper joined the end of one phrase and the start of the next into a single segment.
+    """
+    def nearest_phrase(start, end):
+        middle = (start + end) / 2
+        return min(range(len(phrase_spans)), key=lambda i: 0 if phrase_spans[i][0] <= middle <= phrase_spans[i][1] else min(abs(middle - phrase_spans[i][0]), abs(middle - phrase_spans[i][1])))
+
+    texts = [[] for _ in phrase_spans]
+    for segment in result.get("segments", []):
+        if segment.get("words"):
+            for word in segment["words"]: texts[nearest_phrase(word["start"], word["end"])].append(word["word"])
+        else:
+            texts[nearest_phrase(segment["start"], segment["end"])].append(segment["text"])
+    return ["".join(text) for text in texts]
+
+
+class WhisperPhrasePacker(object):
+    """
+    Creates a new ``WhisperPhrasePacker`` instance, which recognizes short phrases with Whisper several at a time. Whisper pads all audio to a 30 second window, so recognizing a 2 second phrase costs about as much as recognizing 30 seconds of audio; packing phrases into one window shares that cost between them.
+
+    Phrases submitted with ``packer_instance.submit(audio_data)`` are collected for up to ``max_wait`` seconds after the first one arrives, or until ``max_window`` seconds of audio are waiting, then concatenated with ``separator`` seconds of silence between them and recognized with a single call to ``recognizer.recognize_whisper`` (``recognizer`` is a ``Recognizer`` instance). The transcription is then split back into the phrases using the timestamps of its words. ``max_wait`` trades latency for throughput: each phrase can take up to that much longer to be recognized, but the more phrases arrive in that time, the less each one costs.
+
+    The ``model``, ``load_options``, and ``language`` parameters, and other keyword arguments, are the same as for ``recognizer_instance.recognize_whisper``, and apply to every phrase. Word timestamps are enabled by default, because they allow phrases to be split correctly even when Whisper joins the end of one phrase and the start of the next into a single segment.
+
+    The numbers of phrases recognized and packed recognitions run are counted in ``packer_instance.phrases`` and ``packer_instance.packs``.
+
+    Instances are thread-safe. The packer can be used as a context manager, which calls ``packer_instance.close()`` when the ``with`` statement ends.
+    """
+    def __init__(self, recognizer, model="base", load_options=None, language=None, max_wait=0.5, max_window=30, separator=1.0, **transcribe_options):
+        assert max_wait >= 0, "``max_wait`` must be a non-negative number"
+        assert max_window > 0, "``max_window`` must be a positive number"
+        assert separator >= 0, "``separator`` must be a non-negative number"
+        self.recognizer = recognizer
+        self.max_wait = max_wait
+        self.max_window = max_window
+        self.separator = separator
+        transcribe_options.setdefault("word_timestamps", True)
+        self.options = dict(transcribe_options, model=model, load_options=load_options, language=language)
+        self.phrases, self.packs = 0, 0
+        self._pending = []  # ``_PendingPhrase`` for each phrase waiting to be packed, in the order they were submitted
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, audio_data):
+        """Queues ``audio_data`` (an ``AudioData`` instance) for recognition, and returns a ``concurrent.futures.Future`` for its transcription."""
+        assert isinstance(audio_data, AudioData), "``audio_data`` must be audio data"
+        phrase = _PendingPhrase(audio_data.get_raw_data(convert_rate=16000, convert_width=2), time.monotonic())
+        with self._condition:
+            if self._closed: raise RequestError("phrase packer is closed")
+            self._pending.append(phrase)
+            self._condition.notify()
+        return phrase.future
+
+    def recognize(self, audio_data):
+        """Recognizes ``audio_data`` along with any other phrases submitted around the same time, and returns its transcription."""
+        return self.submit(audio_data).result()
+
+    def _take_pack(self):
+        """Removes and returns the phrases that fit into the next window, which always includes the oldest phrase. Must be called with the condition's lock held."""
+        pack, duration = [self._pending[0]], self._pending[0].duration
+        for phrase in self._pending[1:]:
+            if duration + self.separator + phrase.duration > self.max_window: break
+            pack.append(phrase)
+            duration += self.separator + phrase.duration
+        del self._pending[:len(pack)]
+        return pack
+
+    def _pending_duration(self):
+        return sum(phrase.duration for phrase in self._pending) + self.separator * (len(self._pending) - 1)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed: self._condition.wait()
+                if not self._pending: return  # closed, and every phrase has been recognized
+                deadline = self._pending[0].submit_time + self.max_wait
+                while not self._closed and self._pending_duration() < self.max_window:
+                    remaining_time = deadline - time.monotonic()
+                    if remaining_time <= 0: break
+                    self._condition.wait(remaining_time)
+                pack = self._take_pack()
+            self._recognize_pack(pack)
+
+    def _recognize_pack(self, pack):
+        separator = b"\x00\x00" * int(self.separator * 16000)
+        phrase_spans, frame_data, offset = [], [], 0.0
+        for phrase in pack:
+            if frame_data:
+                frame_data.append(separator)
+                offset += len(separator) / 32000.0
+            phrase_spans.append((offset, offset + phrase.duration))
+            frame_data.append(phrase.frame_data)
+            offset += phrase.duration
+        try:
+            result = self.recognizer.recognize_whisper(AudioData(b"".join(frame_data), 16000, 2, 1), show_dict=True, **self.options)
+            texts = split_packed_transcription(result, phrase_spans)
+        except Exception as e:
+            for phrase in pack: phrase.future.set_exception(e)
+            return
+        self.packs += 1
+        self.phrases += len(pack)
+        for phrase, text in zip(pack, texts): phrase.future.set_result(text)
+
+    def close(self):
+        """Recognizes the phrases still waiting without waiting any longer, and stops the packer once they're done."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from speech_recognition.audio import AudioData
+from speech_recognition.exceptions import SetupError
+from speech_recognition.whisper_models import WhisperModelRegistry
+
+
+class FasterWhisperModelRegistry(WhisperModelRegistry):
+    """
+    Creates a new ``FasterWhisperModelRegistry`` instance, which keeps loaded faster-whisper models so that ``recognizer_instance.recognize_faster_whisper`` doesn't reload them for every phrase. It works like ``WhisperModelRegistry``, except that the keyword arguments are those of ``faster_whisper.WhisperModel``.
+
+    CTranslate2 doesn't report how much memory a model uses, so only ``max_size`` limits how many models are kept.
+    """
+
+    @staticmethod
+    def _load_model(name, load_options):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise SetupError("missing faster_whisper module: ensure that faster-whisper is set up correctly.")
+        return WhisperModel(name, **load_options)
+
+    @staticmethod
+    def _get_model_size(model):
+        return 0
+
+
+def recognize_faster_whisper(
+    recognizer,
+    audio_data: "AudioData",
+    model: str = "base",
+    *,
+    device: str = "cpu",
+    compute_type: str = "int8",
+    cpu_threads: int = 0,
+    load_options: dict | None = None,
+    language: str | None = None,
+    translate: bool = False,
+    show_dict: bool = False,
+    **transcribe_options,
+):
+    """
+    Performs speech recognition on ``audio_data`` (an ``AudioData`` instance), using `faster-whisper <https://github.com/SYSTRAN/faster-whisper>`__, a reimplementation of Whisper on the CTranslate2 inference engine that is several times faster than ``recognizer_instance.recognize_whisper`` on the CPU.
+
+    The model is given by ``model``, which can be any of the names ``recognizer_instance.recognize_whisper`` accepts (like ``"base"`` or ``"small.en"``), the name of a CTranslate2 Whisper model on the Hugging Face Hub, or the path to a converted model directory.
+
+    The model runs on ``device`` (``"cpu"``, ``"cuda"``, or ``"auto"``), with weights and computation in ``compute_type``. On the CPU, ``"int8"`` (the default) is usually fastest, with accuracy close to ``"float32"``; ``"int16"`` is a middle ground. ``cpu_threads`` is the number of threads used on the CPU, or 0 for the CTranslate2 default. Other keyword arguments of ``faster_whisper.WhisperModel``, like ``download_root``, can be given in ``load_options``. Models are kept in ``recognizer_instance.faster_whisper_model_registry`` (a ``FasterWhisperModelRegistry`` instance), keyed by all of these options, so only the first call with a given model and options loads it.
+
+    The audio is converted to 16 kHz 16-bit samples, which are passed to the model directly as floating point numbers, without encoding it as a file first.
+
+    The recognition language is determined by ``language``, a language code like ``"en"`` or ``"fr"``, or detected automatically if ``None``. You can translate the result to English by passing ``translate=True``. Other keyword arguments are passed to ``faster_whisper.WhisperModel.transcribe``, like ``beam_size``, ``vad_filter``, or ``word_timestamps``.
+
+    If ``show_dict`` is true, returns a dictionary with the keys ``"text"``, ``"segments"`` (in the same format as the segments returned by ``recognizer_instance.recognize_whisper(audio_data, show_dict=True)``), ``"language"``, and ``"language_probability"``. Otherwise returns only the transcription.
+
+    Raises a ``speech_recognition.exceptions.SetupError`` exception if faster-whisper is not installed.
+    """
+    if not isinstance(audio_data, AudioData):
+        raise ValueError("``audio_data`` must be an ``AudioData`` instance")
+
+    import numpy as np  # a dependency of faster-whisper
+
+    whisper_model = recognizer.faster_whisper_model_registry.get(
+        model,
+        dict(load_options or {}, device=device, compute_type=compute_type, cpu_threads=cpu_threads),
+    )
+    raw_data = audio_data.get_raw_data(
+        **recognizer.format_requirements["faster_whisper"].get_conversion(audio_data)
+    )
+    samples = np.frombuffer(raw_data, dtype="<i2").astype(np.float32) / 32768.0
+
+    with recognizer._measure("decode", engine="faster_whisper"):
+        segments, info = whisper_model.transcribe(
+            samples,
+            language=language,
+            task="translate" if translate else "transcribe",
+            **transcribe_options,
+        )
+        segments = list(segments)  # segments are transcribed lazily, as they are read
+
+    text = "".join(segment.text for segment in segments)
+    if not show_dict:
+        return text
+    return {
+        "text": text,
+        "segments": [
+            {
+                "id": segment.id,
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "avg_logprob": segment.avg_logprob,
+                "no_speech_prob": segment.no_speech_prob,
+                "words": [
+                    {"start": word.start, "end": word.end, "word": word.word, "probability": word.probability}
+                    for word in segment.words
+                ] if segment.words else None,
+            }
+            for segment in segments
+        ],
+        "language": info.language,
+        "language_probability": info.language_probability,
+    }
@@ -0,0 +1,108 @@
+import audioop
+import struct
+
+
+class RTPJitterBuffer(object):
+    """
+    Creates a new ``RTPJitterBuffer`` instance, which puts RTP audio packets received over UDP back in order and hides lost packets, for ``RawStreamSource(sock, sample_rate, rtp=True)``.
+
+    Packets are decoded to 16-bit little-endian PCM with ``channels`` channels: payload type 0 is G.711 μ-law, payload type 8 is G.711 A-law, and every other payload type is treated as L16 (16-bit big-endian PCM, as in `RFC 3551 <https://tools.ietf.org/html/rfc3551>`__).
+
+    Playout starts once ``delay`` seconds of audio have been received, and packets are then returned in sequence number order by ``jitter_buffer_instance.pop()``. A packet that hasn't arrived is only considered lost once ``delay`` seconds of later audio have arrived, which gives reordered and delayed packets time to catch up. A lost packet is replaced by the previous packet at half volume, and further consecutive losses by silence. Packets that arrive after their turn has passed are dropped.
+
+    The numbers of packets received, lost, arriving late, and duplicated are counted in ``jitter_buffer_instance.received``, ``lost``, ``late``, and ``duplicates``, and the number of frames of audio made up to hide lost packets in ``concealed_frames``.
+    """
+    def __init__(self, sample_rate, channels=1, delay=0.06):
+        assert sample_rate > 0, "``sample_rate`` must be a positive integer"
+        assert channels >= 1, "``channels`` must be a positive integer"
+        assert delay >= 0, "``delay`` must be a non-negative number"
+        self.frame_width = 2 * channels
+        self.delay_frames = int(delay * sample_rate)
+        self.packets = {}  # audio of each packet that hasn't been played yet, by extended sequence number
+        self.buffered_frames = 0  # number of frames of audio in ``self.packets``
+        self.next_sequence = None  # extended sequence number of the next packet to play, or ``None`` before playout starts
+        self.highest_sequence = None  # highest extended sequence number received so far
+        self.last_audio = None
+        self.consecutive_losses = 0
+        self.received, self.lost, self.late, self.duplicates, self.concealed_frames = 0, 0, 0, 0, 0
+
+    @staticmethod
+    def parse_packet(packet):
+        """
+        Returns a ``(sequence_number, timestamp, payload_type, payload)`` tuple for the RTP packet ``packet`` (a bytes-like object), or ``None`` if it isn't a valid RTP version 2 packet.
+        """
+        packet = memoryview(packet).cast("B")
+        if len(packet) < 12 or packet[0] >> 6 != 2: return None
+        has_padding, has_extension, csrc_count = packet[0] & 0x20, packet[0] & 0x10, packet[0] & 0x0F
+        payload_type = packet[1] & 0x7F
+        sequence_number, timestamp = struct.unpack_from(">HI", packet, 2)
+        start, end = 12 + 4 * csrc_count, len(packet)
+        if has_extension:
+            if end < start + 4: return None
+            start += 4 + 4 * struct.unpack_from(">H", packet, start + 2)[0]
+        if has_padding: end -= packet[-1]
+        if end < start: return None
+        return sequence_number, timestamp, payload_type, packet[start:end]
+
+    def push(self, packet):
+        """
+        Adds the RTP packet ``packet`` (a bytes-like object, which may be reused afterwards) to the buffer. Returns ``True`` if it was added, or ``False`` if it was invalid, late, or a duplicate.
+        """
+        parsed = self.parse_packet(packet)
+        if parsed is None: return False
+        sequence_number, _, payload_type, payload = parsed
+        if payload_type == 0:
+            audio = audioop.ulaw2lin(payload, 2)
+        elif payload_type == 8:
+            audio = audioop.alaw2lin(payload, 2)
+        else:
+            audio = audioop.byteswap(payload, 2)  # L16 samples are big-endian
+        audio = audio[:len(audio) - len(audio) % self.frame_width]
+
+        # sequence numbers are 16 bits and wrap around, so extend them to be relative to the highest one received so far
+        if self.highest_sequence is None:
+            sequence = sequence_number
+        else:
+            delta = (sequence_number - self.highest_sequence) & 0xFFFF
+            sequence = self.highest_sequence + (delta - 0x10000 if delta >= 0x8000 else delta)
+
+        if self.next_sequence is not None and sequence < self.next_sequence:
+            self.late += 1
+            return False
+        if sequence in self.packets:
+            self.duplicates += 1
+            return False
+        self.packets[sequence] = audio
+        self.buffered_frames += len(audio) // self.frame_width
+        self.highest_sequence = sequence if self.highest_sequence is None else max(self.highest_sequence, sequence)
+        self.received += 1
+        return True
+
+    def pop(self):
+        """
+        Returns the audio of the next packet to play, concealment audio if that packet was lost, or ``None`` if there's nothing to play yet.
+        """
+        if not self.packets: return None
+        if self.next_sequence is None:  # wait for enough audio to absorb the jitter before starting playout
+            if self.buffered_frames < self.delay_frames: return None
+            self.next_sequence = min(self.packets)
+
+        audio = self.packets.pop(self.next_sequence, None)
+        if audio is not None:
+            self.next_sequence += 1
+            self.buffered_frames -= len(audio) // self.frame_width
+            self.last_audio, self.consecutive_losses = audio, 0
+            return audio
+
+        if self.buffered_frames < self.delay_frames: return None  # the missing packet may still arrive
+        self.next_sequence += 1
+        self.lost += 1
+        if self.last_audio is None:  # nothing has been played yet, so skip straight to the next packet
+            return b""
+        if self.consecutive_losses == 0:
+            audio = audioop.mul(self.last_audio, 2, 0.5)
+        else:
+            audio = bytes(len(self.last_audio))
+        self.consecutive_losses += 1
+        self.concealed_frames += len(audio) // self.frame_width
+        return audio
@@ -0,0 +1,527 @@
+import collections
+import contextlib
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+from .audio import FormatConverter
+from .exceptions import RequestError
+
+
+def import_pocketsphinx():
+    """Imports and returns the ``pocketsphinx.pocketsphinx`` module, raising a ``speech_recognition.RequestError`` exception if it is missing or unusable."""
+    try:
+        from pocketsphinx import pocketsphinx
+    except ImportError:
+        raise RequestError("missing PocketSphinx module: ensure that PocketSphinx is set up correctly.")
+    except ValueError:
+        raise RequestError("bad PocketSphinx installation; try reinstalling PocketSphinx version 0.0.9 or better.")
+    if not hasattr(pocketsphinx, "Decoder") or not hasattr(pocketsphinx.Decoder, "default_config"):
+        raise RequestError("outdated PocketSphinx installation; ensure you have PocketSphinx version 0.0.9 or better.")
+    return pocketsphinx
+
+
+def get_sphinx_data_files(language, require_language_model=True):
+    """Returns the ``(acoustic_parameters_directory, language_model_file, phoneme_dictionary_file)`` paths for ``language``, in the same format as the ``language`` parameter of ``recognizer_instance.recognize_sphinx``."""
+    if isinstance(language, str):  # directory containing language data
+        language_directory = os.path.join(os.path.dirname(os.path.realpath(__file__)), "pocketsphinx-data", language)
+        if not os.path.isdir(language_directory):
+            raise RequestError("missing PocketSphinx language data directory: \"{}\"".format(language_directory))
+        acoustic_parameters_directory = os.path.join(language_directory, "acoustic-model")
+        language_model_file = os.path.join(language_directory, "language-model.lm.bin")
+        phoneme_dictionary_file = os.path.join(language_directory, "pronounciation-dictionary.dict")
+    else:  # 3-tuple of Sphinx data file paths
+        acoustic_parameters_directory, language_model_file, phoneme_dictionary_file = language
+    if not os.path.isdir(acoustic_parameters_directory):
+        raise RequestError("missing PocketSphinx language model parameters directory: \"{}\"".format(acoustic_parameters_directory))
+    if require_language_model and not os.path.isfile(language_model_file):
+        raise RequestError("missing PocketSphinx language model file: \"{}\"".format(language_model_file))
+    if not os.path.isfile(phoneme_dictionary_file):
+        raise RequestError("missing PocketSphinx phoneme dictionary file: \"{}\"".format(phoneme_dictionary_file))
+    return acoustic_parameters_directory, language_model_file, phoneme_dictionary_file
+
+
+def get_keywords_file_contents(keyword_entries):
+    """Returns the contents of a PocketSphinx keywords file for ``keyword_entries``, in the same format as the ``keyword_entries`` parameter of ``recognizer_instance.recognize_sphinx``."""
+    # Sphinx documentation recommendeds sensitivities between 1e-50 and 1e-5
+    return "".join("{} /1e{}/\n".format(keyword, 100 * sensitivity - 110) for keyword, sensitivity in keyword_entries)
+
+
+def set_keyword_search(decoder, name, keywords):
+    """Adds a keyword search named ``name`` to ``decoder``, where ``keywords`` is the contents of a PocketSphinx keywords file."""
+    fd, path = tempfile.mkstemp(suffix=".kws")
+    try:
+        with os.fdopen(fd, "w") as f: f.write(keywords)  # the file must be closed before PocketSphinx can open it on Windows
+        decoder.set_kws(name, path)
+    finally:
+        os.remove(path)
+
+
+def set_grammar_search(decoder, name, grammar, grammar_cache):
+    """Adds a grammar search named ``name`` to ``decoder``, where ``grammar`` is the path to a FSG or JSGF grammar file, in the same format as the ``grammar`` parameter of ``recognizer_instance.recognize_sphinx``. JSGF grammars are compiled using ``grammar_cache`` (a ``CompiledGrammarCache`` instance)."""
+    from pocketsphinx import FsgModel
+
+    fsg_path = grammar if grammar.lower().endswith(".fsg") else grammar_cache.get_fsg_path(grammar, decoder.get_logmath())
+    decoder.set_fsg(name, FsgModel(fsg_path, decoder.get_logmath(), 7.5))
+
+
+class CompiledGrammarCache(object):
+    """
+    Creates a new ``CompiledGrammarCache`` instance, which keeps JSGF grammars compiled to FSG grammars in the directory ``directory``, so each grammar is only compiled once.
+
+    If ``directory`` is ``None``, the directory is ``speech_recognition/grammars`` inside the user's cache directory (``$XDG_CACHE_HOME``, or ``~/.cache`` if that isn't set).
+
+    Compiled grammars are named after a hash of the contents of the grammar and every grammar it imports, so editing any of them results in a fresh compilation, and grammars in read-only directories can be used. The compiled grammar used for each grammar file is also remembered in memory, and only looked up again when the modification time or size of one of its files changes.
+
+    Compilation is safe to run concurrently: threads and processes that need the same grammar wait for the first one to compile it, using a lock file next to the compiled grammar. A lock file older than ``lock_timeout`` seconds is assumed to have been left behind by a process that crashed, and is removed.
+
+    The numbers of grammars found in memory, found on disk, and compiled are counted in ``cache_instance.memory_hits``, ``disk_hits``, and ``compilations``.
+    """
+    def __init__(self, directory=None, lock_timeout=60):
+        assert isinstance(lock_timeout, (int, float)) and lock_timeout > 0, "``lock_timeout`` must be a positive number"
+        if directory is None:
+            cache_directory = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            directory = os.path.join(cache_directory, "speech_recognition", "grammars")
+        self.directory = directory
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        self._compiled = {}  # ``(file_signature, fsg_path)`` for each grammar file, where ``file_signature`` is the path, modification time and size of the grammar and every grammar it imports
+        self._compile_locks = {}  # lock for each compiled grammar path, held while it is being compiled by this process
+        self.memory_hits, self.disk_hits, self.compilations = 0, 0, 0
+
+    @staticmethod
+    def _get_grammar_files(grammar):
+        """Returns the path of ``grammar`` and every existing JSGF grammar it imports, directly or indirectly."""
+        search_paths = [os.path.dirname(grammar)] + [path for path in os.environ.get("JSGF_GRAMMAR_PATH", "").split(os.pathsep) if path]  # where PocketSphinx looks for imported grammars
+        paths, pending = [], [grammar]
+        while pending:
+            path = pending.pop()
+            if path in paths: continue
+            paths.append(path)
+            with open(path, "rb") as f:
+                text = f.read().decode("latin-1")  # only the ASCII import statements matter
+            for imported_name in re.findall(r"\bimport\s*<\s*([^>\s]+)\s*>", text):
+                relative_path = imported_name.rsplit(".", 1)[0].replace(".", os.sep) + ".gram"  # ``<com.example.digits.*>`` is in ``com/example/digits.gram``
+                for search_path in search_paths:
+                    imported_path = os.path.join(search_path, relative_path)
+                    if os.path.isfile(imported_path):
+                        pending.append(os.path.abspath(imported_path))
+                        break
+        return paths
+
+    @staticmethod
+    def _get_file_signature(paths):
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def get_fsg_path(self, grammar, logmath):
+        """
+        Returns the path of the compiled FSG grammar for the JSGF grammar file ``grammar``, compiling it with the PocketSphinx ``logmath`` object (as returned by ``decoder.get_logmath()``) if it isn't cached yet.
+
+        As with ``recognizer_instance.recognize_sphinx``, the grammar's public rule named after the file (without its extension) is compiled.
+        """
+        grammar = os.path.abspath(grammar)
+        with self._lock:
+            compiled = self._compiled.get(grammar)
+        if compiled is not None and os.path.exists(compiled[1]) and self._get_file_signature(file_path for file_path, _, _ in compiled[0]) == compiled[0]:
+            with self._lock: self.memory_hits += 1
+            return compiled[1]
+
+        grammar_files = self._get_grammar_files(grammar)
+        file_signature = self._get_file_signature(grammar_files)
+        grammar_hash = hashlib.sha256(os.path.basename(grammar).encode("utf-8"))  # the file name determines which rule is compiled
+        for path in grammar_files:
+            with open(path, "rb") as f: contents = f.read()
+            grammar_hash.update(b"\0" + os.path.relpath(path, os.path.dirname(grammar)).encode("utf-8") + b"\0" + contents)
+        fsg_path = os.path.join(self.directory, grammar_hash.hexdigest() + ".fsg")
+
+        with self._lock:
+            compile_lock = self._compile_locks.setdefault(fsg_path, threading.Lock())
+        with compile_lock:
+            if os.path.exists(fsg_path):
+                with self._lock: self.disk_hits += 1
+            else:
+                self._compile(grammar, fsg_path, logmath)
+        with self._lock:
+            self._compiled[grammar] = (file_signature, fsg_path)
+        return fsg_path
+
+    @staticmethod
+    def _build_fsg(grammar, fsg_path, logmath):
+        """Compiles the JSGF grammar file ``grammar`` into the FSG grammar file ``fsg_path``."""
+        from pocketsphinx import Jsgf
+
+        grammar_name = os.path.splitext(os.path.basename(grammar))[0]
+        jsgf = Jsgf(grammar)
+        rule = jsgf.get_rule("{0}.{0}".format(grammar_name))
+        fsg = jsgf.build_fsg(rule, logmath, 7.5)
+        fsg.writefile(fsg_path)
+
+    def _compile(self, grammar, fsg_path, logmath):
+        os.makedirs(self.directory, exist_ok=True)
+        lock_path = fsg_path + ".lock"
+        while True:  # wait for other processes compiling the same grammar
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.stat(lock_path).st_mtime > self.lock_timeout: os.remove(lock_path)
+                except OSError:  # the lock was released in the meantime
+                    pass
+            if os.path.exists(fsg_path):
+                with self._lock: self.disk_hits += 1
+                return
+            time.sleep(0.05)
+
+        try:
+            if os.path.exists(fsg_path):  # compiled by another process just before the lock was acquired
+                with self._lock: self.disk_hits += 1
+                return
+            temporary_path = "{}.{}.tmp".format(fsg_path, os.getpid())
+            try:
+                self._build_fsg(grammar, temporary_path, logmath)
+                os.replace(temporary_path, fsg_path)  # readers never see a partially written grammar
+            except BaseException:
+                if os.path.exists(temporary_path): os.remove(temporary_path)
+                raise
+            with self._lock: self.compilations += 1
+        finally:
+            os.remove(lock_path)
+
+
+class _DecoderEntry(object):
+    def __init__(self):
+        self.decoder = None
+        self.default_search = None
+        self.searches = {}  # definition of each named search added to the decoder, by name
+
+
+class _DecoderPool(object):
+    def __init__(self, signature):
+        self.signature = signature  # state of the model files when the decoders were loaded
+        self.idle = []  # ``_DecoderEntry`` for each loaded decoder that isn't checked out
+        self.size = 0  # number of decoders that are idle, loading, or checked out
+        self.in_use = 0
+        self.created_time = time.monotonic()
+        self.busy_seconds = 0  # total time decoders spent checked out, not counting the ones still checked out
+        self.checkout_times = 0  # sum of the checkout times of the decoders still checked out
+        self.checkouts, self.waits, self.timeouts, self.wait_seconds = 0, 0, 0, 0
+
+
+class SphinxDecoderCache(object):
+    """
+    Creates a new ``SphinxDecoderCache`` instance, which keeps loaded PocketSphinx decoders for up to ``max_size`` configurations so that ``recognizer_instance.recognize_sphinx`` doesn't reload the acoustic model, language model, and phoneme dictionary for every phrase.
+
+    Decoders are keyed by their model files and extra configuration options. When the cache is full, the decoders of the least recently used configuration are evicted. Every time a decoder is used, the modification times and sizes of its model files (including every file in the acoustic model directory) are checked, and if any of them changed on disk, the decoders are reloaded.
+
+    A decoder can only be used by one thread at a time, so each configuration has a pool of up to ``pool_size`` decoders, which are loaded as concurrent threads need them. The pool size of a single configuration can be changed with ``cache_instance.set_pool_size``. When every decoder in a pool is checked out, threads wait for one to be checked back in, for up to ``timeout`` seconds (or indefinitely if ``timeout`` is ``None``), after which a ``speech_recognition.RequestError`` exception is raised. ``cache_instance.get_stats()`` describes how busy each pool is.
+
+    The numbers of cache hits, misses, evictions, and invalidations are counted in ``cache_instance.hits``, ``misses``, ``evictions``, and ``invalidations``.
+
+    Keyword and grammar searches can be registered by name with ``cache_instance.add_search``, and are then added to each decoder the first time it is used with them, rather than on every call. JSGF grammars are compiled using ``grammar_cache`` (a ``CompiledGrammarCache`` instance, or ``None`` to use one with the default directory), which is available as ``cache_instance.grammar_cache``.
+
+    Instances are thread-safe.
+    """
+    def __init__(self, max_size=4, grammar_cache=None, pool_size=1, timeout=None):
+        assert isinstance(max_size, int) and max_size >= 1, "``max_size`` must be a positive integer"
+        assert grammar_cache is None or isinstance(grammar_cache, CompiledGrammarCache), "``grammar_cache`` must be ``None`` or a ``CompiledGrammarCache`` instance"
+        assert isinstance(pool_size, int) and pool_size >= 1, "``pool_size`` must be a positive integer"
+        assert timeout is None or (isinstance(timeout, (int, float)) and timeout >= 0), "``timeout`` must be ``None`` or a non-negative number"
+        self.max_size = max_size
+        self.grammar_cache = CompiledGrammarCache() if grammar_cache is None else grammar_cache
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._pools = collections.OrderedDict()  # ``_DecoderPool`` for each configuration, from least to most recently used
+        self._pool_sizes = {}  # pool size for each configuration set with ``set_pool_size``
+        self._lock = threading.Lock()
+        self._checked_in = threading.Condition(self._lock)  # notified whenever a decoder is checked back in, or pool sizes change
+        self.searches = {}  # definition of each registered search, by name
+        self.hits, self.misses, self.evictions, self.invalidations = 0, 0, 0, 0
+
+    def add_search(self, name, keyword_entries=None, grammar=None):
+        """
+        Registers a search named ``name``, which can then be used with ``recognizer_instance.recognize_sphinx(audio_data, search=name)``. Registering a search with the same name again replaces it.
+
+        Exactly one of ``keyword_entries`` and ``grammar`` must be specified, in the same format as the corresponding parameters of ``recognizer_instance.recognize_sphinx``. Search names starting with an underscore are reserved.
+        """
+        assert isinstance(name, str) and name and not name.startswith("_"), "``name`` must be a non-empty string that doesn't start with an underscore"
+        assert (keyword_entries is None) != (grammar is None), "exactly one of ``keyword_entries`` and ``grammar`` must be specified"
+        if keyword_entries is not None:
+            keyword_entries = list(keyword_entries)
+            assert keyword_entries and all(isinstance(keyword, str) and 0 <= sensitivity <= 1 for keyword, sensitivity in keyword_entries), "``keyword_entries`` must be a non-empty list of pairs of strings and numbers between 0 and 1"
+            definition = ("keywords", get_keywords_file_contents(keyword_entries))
+        else:
+            if not os.path.exists(grammar):
+                raise ValueError("Grammar '{0}' does not exist.".format(grammar))
+            definition = ("grammar", os.path.abspath(grammar))
+        with self._lock:
+            self.searches[name] = definition
+
+    def remove_search(self, name):
+        with self._lock:
+            del self.searches[name]
+
+    @staticmethod
+    def _get_key(acoustic_parameters_directory, language_model_file, phoneme_dictionary_file, options):
+        return os.path.abspath(acoustic_parameters_directory), os.path.abspath(language_model_file), os.path.abspath(phoneme_dictionary_file), tuple(sorted((options or {}).items()))
+
+    def set_pool_size(self, acoustic_parameters_directory, language_model_file, phoneme_dictionary_file, pool_size, options=None):
+        """
+        Sets the maximum number of decoders kept for the given model files and extra configuration options (in the same format as for ``cache_instance.acquire``) to ``pool_size``, or back to ``cache_instance.pool_size`` if ``pool_size`` is ``None``.
+        """
+        assert pool_size is None or (isinstance(pool_size, int) and pool_size >= 1), "``pool_size`` must be ``None`` or a positive integer"
+        key = self._get_key(acoustic_parameters_directory, language_model_file, phoneme_dictionary_file, options)
+        with self._checked_in:
+            if pool_size is None:
+                self._pool_sizes.pop(key, None)
+            else:
+                self._pool_sizes[key] = pool_size
+            pool = self._pools.get(key)
+            if pool is not None:  # unload idle decoders beyond the new size
+                while pool.idle and pool.size > self._pool_sizes.get(key, self.pool_size):
+                    pool.idle.pop()
+                    pool.size -= 1
+            self._checked_in.notify_all()
+
+    @staticmethod
+    def _model_signature(acoustic_parameters_directory, language_model_file, phoneme_dictionary_file):
+        """Returns the modification time and size of every model file, or ``None`` for files that don't exist."""
+        paths = [language_model_file, phoneme_dictionary_file]
+        if os.path.isdir(acoustic_parameters_directory):
+            paths += [os.path.join(acoustic_parameters_directory, name) for name in sorted(os.listdir(acoustic_parameters_directory))]
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _create_decoder(self, acoustic_parameters_directory, language_model_file, phoneme_dictionary_file, options):
+        pocketsphinx = import_pocketsphinx()
+        config = pocketsphinx.Decoder.default_config()
+        config.set_string("-hmm", acoustic_parameters_directory)  # set the path of the hidden Markov model (HMM) parameter files
+        config.set_string("-lm", language_model_file)
+        config.set_string("-dict", phoneme_dictionary_file)
+        config.set_string("-logfn", os.devnull)  # disable logging (logging causes unwanted output in terminal)
+        for name, value in options:
+            if isinstance(value, bool):
+                config.set_boolean(name, value)
+            elif isinstance(value, int):
+                config.set_int(name, value)
+            elif isinstance(value, float):
+                config.set_float(name, value)
+            else:
+                config.set_string(name, value)
+        return pocketsphinx.Decoder(config)
+
+    def _get_pool(self, key, signature):
+        """Returns the pool for the configuration ``key``, creating it if it doesn't exist or its model files changed. Must be called with the cache lock held."""
+        pool = self._pools.get(key)
+        if pool is not None and pool.signature != signature:  # the model files changed since the decoders were loaded
+            del self._pools[key]
+            self.invalidations += 1
+            pool = None
+        if pool is None:
+            self.misses += 1
+            pool = self._pools[key] = _DecoderPool(signature)
+        else:
+            self.hits += 1
+            self._pools.move_to_end(key)
+        while len(self._pools) > self.max_size:
+            self._pools.popitem(last=False)  # decoders of the evicted pool that are checked out are unloaded when they are checked back in
+            self.evictions += 1
+        return pool
+
+    @contextlib.contextmanager
+    def acquire(self, acoustic_parameters_directory, language_model_file, phoneme_dictionary_file, options=None, search=None, detach=False):
+        """
+        Context manager that checks out a decoder for the given model files, with the extra PocketSphinx configuration options ``options`` (``None``, or a dictionary like ``{"-beam": 1e-60}``), and returns it for use inside the ``with`` statement. The decoder is checked back in when the ``with`` statement ends.
+
+        An idle decoder is reused if there is one, otherwise a new one is loaded if the pool isn't full yet, otherwise this waits for another thread to check one in.
+
+        If ``search`` is ``None``, the decoder is set to its default search, so searches set for earlier utterances don't carry over. Otherwise, it is set to the search registered with ``cache_instance.add_search`` under that name. If the ``with`` statement ends with an exception, the decoder is discarded, since it may be in the middle of an utterance.
+
+        If ``detach`` is true, the decoder is removed from the pool when the ``with`` statement ends instead of being checked in, so the caller can keep reading its results while other threads use the pool. A new decoder is loaded in its place when one is needed.
+        """
+        key = self._get_key(acoustic_parameters_directory, language_model_file, phoneme_dictionary_file, options)
+        signature = self._model_signature(*key[:3])
+        with self._checked_in:
+            definition = None if search is None else self.searches.get(search)
+            if search is not None and definition is None:
+                raise ValueError("Search '{0}' is not registered.".format(search))
+            pool = self._get_pool(key, signature)
+            wait_start_time = None
+            while True:
+                if pool.idle:
+                    entry = pool.idle.pop()
+                    break
+                if pool.size < self._pool_sizes.get(key, self.pool_size):
+                    entry = _DecoderEntry()
+                    pool.size += 1
+                    break
+                if wait_start_time is None:
+                    wait_start_time = time.monotonic()
+                    pool.waits += 1
+                remaining_time = None if self.timeout is None else wait_start_time + self.timeout - time.monotonic()
+                if remaining_time is not None and remaining_time <= 0:
+                    pool.timeouts += 1
+                    pool.wait_seconds += time.monotonic() - wait_start_time
+                    raise RequestError("timed out waiting for a PocketSphinx decoder; consider increasing the decoder pool size")
+                self._checked_in.wait(remaining_time)
+                if self._pools.get(key) is not pool:  # evicted, invalidated, or cleared while waiting
+                    pool = self._get_pool(key, signature)
+            checkout_time = time.monotonic()
+            if wait_start_time is not None: pool.wait_seconds += checkout_time - wait_start_time
+            pool.in_use += 1
+            pool.checkouts += 1
+            pool.checkout_times += checkout_time
+
+        try:
+            if entry.decoder is None:  # load outside the cache lock, so other configurations aren't held up
+                entry.decoder = self._create_decoder(*key)
+                entry.default_search = entry.decoder.get_search()
+            if search is None:
+                search = entry.default_search  # undo a keyword or grammar search left by the previous utterance - this happens here rather than after it, so its results stay readable
+            elif entry.searches.get(search) is not definition:  # first use of this search on this decoder, or it was registered again since
+                if definition[0] == "keywords":
+                    set_keyword_search(entry.decoder, search, definition[1])
+                else:
+                    set_grammar_search(entry.decoder, search, definition[1], self.grammar_cache)
+                entry.searches[search] = definition
+            if entry.decoder.get_search() != search: entry.decoder.set_search(search)
+            yield entry.decoder
+        except BaseException:
+            entry.decoder = None
+            raise
+        finally:
+            if detach: entry.decoder = None  # it belongs to the caller now
+            with self._checked_in:
+                pool.in_use -= 1
+                pool.checkout_times -= checkout_time
+                pool.busy_seconds += time.monotonic() - checkout_time
+                if entry.decoder is not None and self._pools.get(key) is pool and pool.size <= self._pool_sizes.get(key, self.pool_size):
+                    pool.idle.append(entry)
+                else:  # discarded, detached, the pool is no longer cached, or the pool was made smaller
+                    pool.size -= 1
+                self._checked_in.notify_all()
+
+    def get_stats(self):
+        """
+        Returns a list of dictionaries describing the decoder pool of each cached configuration, from least to most recently used, with the following keys:
+
+        * ``"configuration"``: the model file paths and sorted extra configuration options, as a ``(acoustic_parameters_directory, language_model_file, phoneme_dictionary_file, options)`` tuple.
+        * ``"pool_size"``: the maximum number of decoders.
+        * ``"loaded"`` and ``"in_use"``: the numbers of decoders that are loaded (or loading), and checked out.
+        * ``"utilization"``: the average fraction of the pool that has been checked out since the pool was created, between 0 and 1. Utilization close to 1 with many waits means the pool is too small.
+        * ``"checkouts"``, ``"waits"``, and ``"timeouts"``: the numbers of checkouts, checkouts that had to wait for a decoder, and waits that timed out.
+        * ``"wait_seconds"``: the total time spent waiting for decoders.
+        """
+        now = time.monotonic()
+        with self._lock:
+            stats = []
+            for key, pool in self._pools.items():
+                pool_size = self._pool_sizes.get(key, self.pool_size)
+                busy_seconds = pool.busy_seconds + pool.in_use * now - pool.checkout_times
+                elapsed_time = now - pool.created_time
+                stats.append({
+                    "configuration": key,
+                    "pool_size": pool_size,
+                    "loaded": pool.size,
+                    "in_use": pool.in_use,
+                    "utilization": min(1.0, busy_seconds / (pool_size * elapsed_time)) if elapsed_time > 0 else 0.0,
+                    "checkouts": pool.checkouts,
+                    "waits": pool.waits,
+                    "timeouts": pool.timeouts,
+                    "wait_seconds": pool.wait_seconds,
+                })
+            return stats
+
+    def clear(self):
+        """Discards every cached decoder. Decoders that are checked out are unloaded when they are checked back in."""
+        with self._checked_in:
+            self._pools.clear()
+            self._checked_in.notify_all()
+
+
+class SphinxStreamingSession(object):
+    """
+    Creates a new ``SphinxStreamingSession`` instance, which decodes each phrase with CMU Sphinx while it is being captured, rather than all at once after it ends. Pass it to ``recognizer_instance.listen(source, streaming_decoder=session)`` or ``recognizer_instance.listen_in_background(source, callback, streaming_decoder=session)``, and the transcription of each phrase is ready within milliseconds of the phrase ending.
+
+    Decoders are taken from ``recognizer.sphinx_decoder_cache`` (``recognizer`` is a ``Recognizer`` instance), and each one is held for the duration of a phrase. The ``language`` and ``decoder_options`` parameters are the same as for ``recognizer_instance.recognize_sphinx``. To use a keyword or grammar search, register it with ``recognizer.sphinx_decoder_cache.add_search`` and pass its name as ``search``.
+
+    While a phrase is being decoded, ``session_instance.partial_hypothesis`` is the transcription of the phrase so far, or ``None`` if nothing has been recognized yet. If ``on_partial`` is not ``None``, it is called with the new partial transcription whenever it changes. Once the phrase ends, ``session_instance.hypothesis`` is its final transcription, or ``None`` if it was unintelligible.
+
+    Phrases can also be decoded without ``listen`` by calling ``session_instance.start``, ``process`` for each chunk of audio, and ``finish``. A session decodes one phrase at a time, so each listening thread should use its own instance.
+    """
+    def __init__(self, recognizer, language="en-US", search=None, decoder_options=None, on_partial=None):
+        assert search is None or isinstance(search, str), "``search`` must be ``None`` or the name of a search registered with ``SphinxDecoderCache.add_search``"
+        assert decoder_options is None or isinstance(decoder_options, dict), "``decoder_options`` must be ``None`` or a dictionary"
+        assert on_partial is None or callable(on_partial), "``on_partial`` must be ``None`` or a callable"
+        self.recognizer = recognizer
+        self.data_files = get_sphinx_data_files(language)
+        self.search = search
+        self.decoder_options = decoder_options
+        self.on_partial = on_partial
+        self.partial_hypothesis, self.hypothesis = None, None
+        self.decoder, self._exit_stack, self._converter = None, None, None
+
+    def start(self, sample_rate, sample_width, channels=1):
+        """Starts decoding a new phrase of audio with the given sample rate, sample width, and channel count, abandoning the phrase in progress, if any."""
+        self.cancel()
+        exit_stack = contextlib.ExitStack()
+        decoder = exit_stack.enter_context(self.recognizer.sphinx_decoder_cache.acquire(*self.data_files, options=self.decoder_options, search=self.search))
+        try:
+            convert_rate, convert_width = self.recognizer.format_requirements["sphinx"].get_target_format(sample_rate, sample_width)
+            self._converter = FormatConverter(sample_rate, sample_width, channels, convert_rate, convert_width, None if channels == 1 else range(channels))
+            decoder.start_utt()
+        except BaseException:
+            exit_stack.__exit__(*sys.exc_info())
+            raise
+        self.decoder, self._exit_stack = decoder, exit_stack
+        self.partial_hypothesis, self.hypothesis = None, None
+
+    def process(self, frame_data):
+        """Decodes the next chunk of audio of the phrase, ``frame_data``, and updates ``session_instance.partial_hypothesis``."""
+        assert self.decoder is not None, "``session_instance.start`` must be called before decoding a phrase"
+        self.decoder.process_raw(self._converter.convert(frame_data), False, False)  # process audio data with recognition enabled (no_search = False), as part of an ongoing utterance (full_utt = False)
+        hypothesis = self.decoder.hyp()
+        partial_hypothesis = hypothesis.hypstr if hypothesis is not None and hypothesis.hypstr else None
+        if partial_hypothesis != self.partial_hypothesis:
+            self.partial_hypothesis = partial_hypothesis
+            if self.on_partial is not None and partial_hypothesis is not None: self.on_partial(partial_hypothesis)
+
+    def finish(self):
+        """Ends the phrase, and returns its final transcription, which is also stored in ``session_instance.hypothesis``, or ``None`` if it was unintelligible or no phrase was started."""
+        self.hypothesis = None if self.decoder is None else self._end_utterance()
+        return self.hypothesis
+
+    def cancel(self):
+        """Abandons the phrase being decoded, if any."""
+        if self.decoder is not None: self._end_utterance()
+
+    def _end_utterance(self):
+        """Ends the decoder's utterance and returns its transcription, then returns the decoder to the cache, discarding it if the utterance can't be ended cleanly."""
+        decoder, exit_stack = self.decoder, self._exit_stack
+        self.decoder, self._exit_stack = None, None
+        try:
+            decoder.end_utt()
+            hypothesis = decoder.hyp()  # read before another thread can take the decoder
+        except BaseException:
+            exit_stack.__exit__(*sys.exc_info())
+            raise
+        exit_stack.close()
+        return hypothesis.hypstr if hypothesis is not None and hypothesis.hypstr else None
@@ -0,0 +1,126 @@
+import collections
+import threading
+
+from .exceptions import SetupError
+
+
+def get_load_options_key(load_options):
+    """Returns a hashable key for the ``whisper.load_model`` keyword arguments ``load_options`` (``None`` or a dictionary), which is the same for equivalent options in any order."""
+    def make_hashable(value):
+        try:
+            hash(value)
+        except TypeError:
+            return repr(value)
+        return value
+    return tuple(sorted((name, make_hashable(value)) for name, value in (load_options or {}).items()))
+
+
+class _ModelEntry(object):
+    def __init__(self):
+        self.lock = threading.Lock()  # held while the model is loading
+        self.model = None
+        self.size = 0  # memory used by the model's parameters and buffers, in bytes
+
+
+class WhisperModelRegistry(object):
+    """
+    Creates a new ``WhisperModelRegistry`` instance, which keeps loaded Whisper models so that ``recognizer_instance.recognize_whisper`` doesn't reload them for every phrase.
+
+    Models are keyed by their name and the keyword arguments they were loaded with (like ``{"device": "cpu", "download_root": "models"}``), so the same model loaded with different options is kept separately. Up to ``max_size`` models are kept, and if ``memory_budget`` is not ``None``, the memory used by their parameters and buffers is kept to at most ``memory_budget`` bytes. When either limit is exceeded, the least recently used models are evicted. The most recently loaded model is always kept, even if it alone exceeds the budget.
+
+    Loading is single-flight: when several threads need a model that isn't loaded yet, the first one loads it, and the rest wait for it rather than loading their own copies. Models for different keys load concurrently.
+
+    The numbers of cache hits, misses, and evictions are counted in ``registry_instance.hits``, ``misses``, and ``evictions``, and the memory used by the kept models in ``registry_instance.memory_used``.
+
+    Instances are thread-safe.
+    """
+    def __init__(self, max_size=4, memory_budget=None):
+        assert isinstance(max_size, int) and max_size >= 1, "``max_size`` must be a positive integer"
+        assert memory_budget is None or (isinstance(memory_budget, int) and memory_budget > 0), "``memory_budget`` must be ``None`` or a positive integer"
+        self.max_size = max_size
+        self.memory_budget = memory_budget
+        self._entries = collections.OrderedDict()  # ``_ModelEntry`` for each key, from least to most recently used
+        self._lock = threading.Lock()
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+    @property
+    def memory_used(self):
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+    @staticmethod
+    def _load_model(name, load_options):
+        try:
+            import whisper
+        except ImportError:
+            raise SetupError("missing whisper module: ensure that openai-whisper is set up correctly.")
+        return whisper.load_model(name, **load_options)
+
+    @staticmethod
+    def _get_model_size(model):
+        """Returns the memory used by the parameters and buffers of the PyTorch module ``model``, in bytes."""
+        return sum(tensor.numel() * tensor.element_size() for tensors in (model.parameters(), model.buffers()) for tensor in tensors)
+
+    def get(self, name, load_options=None):
+        """
+        Returns the Whisper model ``name`` (like ``"base"`` or ``"small.en"``) loaded with the ``whisper.load_model`` keyword arguments ``load_options`` (``None`` or a dictionary), loading it if it isn't kept yet.
+        """
+        assert isinstance(name, str), "``name`` must be a string"
+        assert load_options is None or isinstance(load_options, dict), "``load_options`` must be ``None`` or a dictionary"
+        key = (name, get_load_options_key(load_options))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                entry = self._entries[key] = _ModelEntry()
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+
+        with entry.lock:  # load outside the registry lock, so other models aren't held up, while threads needing this one wait for it
+            if entry.model is None:
+                try:
+                    model = self._load_model(name, dict(load_options or {}))
+                except BaseException:
+                    with self._lock:
+                        if self._entries.get(key) is entry: del self._entries[key]
+                    raise
+                entry.model, entry.size = model, self._get_model_size(model)
+                with self._lock:
+                    self._evict(keep=entry)
+            return entry.model
+
+    def _evict(self, keep):
+        """Evicts the least recently used loaded models until the registry is within its limits, without evicting ``keep`` or models that are still loading. Must be called with the registry lock held."""
+        for key, entry in list(self._entries.items()):
+            within_budget = self.memory_budget is None or sum(kept.size for kept in self._entries.values()) <= self.memory_budget
+            if len(self._entries) <= self.max_size and within_budget: break
+            if entry is keep or entry.model is None: continue
+            del self._entries[key]  # threads still using the model keep it alive until they're done
+            self.evictions += 1
+
+    def preload(self, name, load_options=None):
+        """Loads the Whisper model ``name`` with ``load_options`` ahead of time, if it isn't kept yet, and returns it."""
+        return self.get(name, load_options)
+
+    @staticmethod
+    def _run_warmup(model):
+        import numpy as np
+        import torch
+        import whisper
+
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(np.zeros(16000, dtype=np.float32)), getattr(model.dims, "n_mels", 80)).to(model.device)
+        whisper.decode(model, mel, whisper.DecodingOptions(fp16=torch.cuda.is_available(), without_timestamps=True))
+
+    def warmup(self, name, load_options=None):
+        """
+        Loads the Whisper model ``name`` with ``load_options`` if it isn't kept yet, runs it on a second of silence, and returns it. The first forward pass of a model is much slower than later ones, because it allocates memory and selects kernels, so this moves that cost out of the first real recognition.
+        """
+        model = self.get(name, load_options)
+        self._run_warmup(model)
+        return model
+
+    def clear(self):
+        """Discards every kept model."""
+        with self._lock:
+            self._entries.clear()
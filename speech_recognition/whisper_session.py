@@ -0,0 +1,81 @@
+from .audio import AudioData
+
+
+class WhisperSession(object):
+    """
+    Creates a new ``WhisperSession`` instance, which recognizes consecutive phrases from a single stream with Whisper, carrying context over from one phrase to the next.
+
+    When ``language`` is ``None``, ``recognizer_instance.recognize_whisper`` detects the language of every phrase, which takes a decoder pass each time. A session instead detects the language of each phrase itself and passes it on, and once ``confident_phrases`` consecutive phrases have been detected as the same language with a probability of at least ``min_probability``, that language is kept in ``session_instance.language`` and detection is skipped for the rest of the stream. English-only models like ``"base.en"`` never need detection.
+
+    If ``carry_prompt`` is true (the default), the end of the transcription so far, up to ``max_prompt_length`` characters, is kept in ``session_instance.context`` and passed to Whisper as the ``initial_prompt`` of the next phrase, which helps it keep names, spelling, and punctuation consistent across phrases. An ``initial_prompt`` passed as a keyword argument is used until there is a transcription to carry over.
+
+    Phrases are recognized with ``recognizer.recognize_whisper`` (``recognizer`` is a ``Recognizer`` instance). The ``model`` and ``load_options`` parameters, and other keyword arguments, are the same as for ``recognizer_instance.recognize_whisper``, and apply to every phrase. The number of phrases whose language was detected is counted in ``session_instance.detections``.
+
+    A session follows one stream, so each stream should use its own instance.
+    """
+    def __init__(self, recognizer, model="base", load_options=None, language=None, confident_phrases=3, min_probability=0.8, carry_prompt=True, max_prompt_length=200, **transcribe_options):
+        assert isinstance(confident_phrases, int) and confident_phrases >= 1, "``confident_phrases`` must be a positive integer"
+        assert 0 <= min_probability <= 1, "``min_probability`` must be a number between 0 and 1"
+        assert isinstance(max_prompt_length, int) and max_prompt_length >= 0, "``max_prompt_length`` must be a non-negative integer"
+        self.recognizer = recognizer
+        self.model = model
+        self.load_options = load_options
+        self.confident_phrases = confident_phrases
+        self.min_probability = min_probability
+        self.carry_prompt = carry_prompt
+        self.max_prompt_length = max_prompt_length
+        self.initial_prompt = transcribe_options.pop("initial_prompt", None)
+        self.transcribe_options = transcribe_options
+        self.fixed_language = language
+        self.detections = 0
+        self.reset()
+
+    def reset(self, keep_language=False):
+        """Forgets the transcription so far, and unless ``keep_language`` is true, the detected language, as when the stream switches to a different speaker or recording."""
+        self.context = ""
+        if not keep_language:
+            self.language = self.fixed_language
+            self._candidate_language, self._confident_count = None, 0
+
+    def _detect_language(self, audio_data):
+        """Returns the most likely language of ``audio_data`` as a Whisper language code, and its probability."""
+        import numpy as np
+        import whisper
+
+        model = self.recognizer.whisper_model_registry.get(self.model, self.load_options)
+        if not model.is_multilingual: return "en", 1.0
+        samples = np.frombuffer(audio_data.get_raw_data(convert_rate=16000, convert_width=2), dtype="<i2").astype(np.float32) / 32768
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(samples), getattr(model.dims, "n_mels", 80)).to(model.device)
+        _, probabilities = model.detect_language(mel)
+        language = max(probabilities, key=probabilities.get)
+        return language, probabilities[language]
+
+    def recognize(self, audio_data, show_dict=False):
+        """
+        Recognizes the next phrase of the stream, ``audio_data`` (an ``AudioData`` instance). Returns the transcription, or if ``show_dict`` is true, the full result dictionary, the same as ``recognizer_instance.recognize_whisper``.
+        """
+        assert isinstance(audio_data, AudioData), "``audio_data`` must be audio data"
+        language = self.language
+        if language is None:
+            language, probability = self._detect_language(audio_data)
+            self.detections += 1
+            if probability < self.min_probability:
+                self._candidate_language, self._confident_count = None, 0
+            elif language == self._candidate_language:
+                self._confident_count += 1
+            else:
+                self._candidate_language, self._confident_count = language, 1
+            if self._confident_count >= self.confident_phrases: self.language = language
+
+        options = dict(self.transcribe_options, model=self.model, load_options=self.load_options, language=language)
+        prompt = self.context or self.initial_prompt
+        if prompt: options["initial_prompt"] = prompt  # the context is always empty if ``carry_prompt`` is false
+        result = self.recognizer.recognize_whisper(audio_data, show_dict=True, **options)
+
+        if self.carry_prompt:
+            context = (self.context + " " + result["text"].strip()).strip()
+            if len(context) > self.max_prompt_length:
+                context = context[len(context) - self.max_prompt_length:]
+                if " " in context: context = context.split(" ", 1)[1]  # keep whole words
+            self.context = context
+        return result if show_dict else result["text"]
@@ -0,0 +1,200 @@
+import concurrent.futures
+import gc
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import threading
+
+from .audio import AudioData
+from .exceptions import RequestError, SetupError, UnknownValueError
+
+
+def _worker_main(recognizer, jobs, results):
+    """Runs in each worker process: recognizes jobs from ``jobs`` with ``recognizer``, and sends their results to ``results``."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl + C is handled by the parent process, which stops the workers
+    while True:
+        job = jobs.get()
+        if job is None: break
+        job_id, engine, audio_data, options = job
+        results.send(("started", job_id, None))
+        try:
+            message = ("result", job_id, getattr(recognizer, "recognize_" + engine)(audio_data, **options))
+        except Exception as e:
+            message = ("error", job_id, e)
+        try:
+            results.send(message)
+        except Exception as e:  # the result or exception can't be pickled
+            results.send(("error", job_id, RequestError("recognition result could not be sent from the worker process: {}".format(e))))
+    results.close()
+
+
+def get_process_memory_usage(pid):
+    """
+    Returns a dictionary with the resident set size (``"rss"``), proportional set size (``"pss"``), and shared and private resident memory (``"shared"`` and ``"private"``) of the process with ID ``pid``, in bytes, as reported by ``/proc/<pid>/smaps_rollup``. Values that can't be determined on this platform are ``None``.
+    """
+    fields = {}
+    try:
+        with open("/proc/{}/smaps_rollup".format(pid)) as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if value.strip().endswith("kB"): fields[name] = int(value.split()[0]) * 1024
+    except OSError:
+        try:  # Linux before 4.14 only has the resident set size
+            with open("/proc/{}/status".format(pid)) as f:
+                for line in f:
+                    if line.startswith("VmRSS:"): fields["Rss"] = int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    has_sharing = "Shared_Clean" in fields
+    return {
+        "rss": fields.get("Rss"),
+        "pss": fields.get("Pss"),
+        "shared": fields["Shared_Clean"] + fields.get("Shared_Dirty", 0) if has_sharing else None,
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0) if has_sharing else None,
+    }
+
+
+class RecognitionWorkerPool(object):
+    """
+    Creates a new ``RecognitionWorkerPool`` instance, which recognizes audio in ``worker_count`` worker processes (or one per CPU core if ``None``) that share models loaded once by this process.
+
+    The models are loaded by calling ``recognizer.recognize_<engine>`` on a second of silence for each ``engine`` in ``engines``, a dictionary mapping engine names like ``"sphinx"``, ``"vosk"``, ``"whisper"``, or ``"tensorflow"`` to dictionaries of keyword arguments, like ``{"sphinx": {"language": "en-US"}, "whisper": {"model": "base"}}``. The arguments should select the same models that will be used for recognition. The workers are then forked from this process, so they start with the models already loaded, and the memory holding them is shared copy-on-write between every worker rather than copied. ``worker_pool_instance.get_memory_usage()`` reports how much memory each worker actually shares.
+
+    Jobs are submitted with ``worker_pool_instance.submit(audio_data, engine, **options)``, which returns a ``concurrent.futures.Future`` for the result of ``recognizer.recognize_<engine>(audio_data, **options)`` in whichever worker is free first, or ``worker_pool_instance.recognize(audio_data, engine, **options)``, which waits for it. Exceptions raised by the recognizer, such as ``speech_recognition.UnknownValueError``, are raised by the future. Results must be picklable, so options like ``show_all=True`` for Sphinx, which returns the decoder, can't be used.
+
+    Forking requires a POSIX platform; on other platforms a ``speech_recognition.SetupError`` exception is raised. Engines whose libraries start threads or GPU contexts while loading models (like TensorFlow, or Whisper on a GPU) may not work after forking, and should be loaded on the CPU or used in a single process instead.
+
+    The pool can be used as a context manager, which calls ``worker_pool_instance.close()`` when the ``with`` statement ends.
+    """
+    def __init__(self, recognizer, engines, worker_count=None):
+        assert isinstance(engines, dict) and all(hasattr(recognizer, "recognize_" + engine) and isinstance(options, dict) for engine, options in engines.items()), "``engines`` must be a dictionary mapping engine names to dictionaries of keyword arguments"
+        assert worker_count is None or (isinstance(worker_count, int) and worker_count >= 1), "``worker_count`` must be ``None`` or a positive integer"
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:
+            raise SetupError("forking worker processes is not supported on this platform")
+        self.recognizer = recognizer
+        self.engines = engines
+
+        silence = AudioData(bytes(2 * 16000), 16000, 2, 1)
+        for engine, options in engines.items():
+            try:
+                getattr(recognizer, "recognize_" + engine)(silence, **options)
+            except UnknownValueError:  # the models were still loaded
+                pass
+
+        self._jobs = context.SimpleQueue()
+        self._futures = {}  # ``Future`` for each job that hasn't finished yet, by job ID
+        self._current_jobs = {}  # ID of the job each worker process is working on, by process ID
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count()
+        self._closed = False
+        self.jobs_completed = {}  # number of jobs completed by each worker process, by process ID
+
+        if worker_count is None: worker_count = os.cpu_count() or 1
+        self.workers, connections = [], []
+        gc.collect()
+        gc.freeze()  # move every existing object out of the garbage collector's generations, so collections in the workers don't write to (and copy) the pages holding them
+        try:
+            for _ in range(worker_count):
+                reader, writer = context.Pipe(duplex=False)
+                worker = context.Process(target=_worker_main, args=(recognizer, self._jobs, writer), daemon=True)
+                worker.start()
+                writer.close()  # closed before the next worker is forked, so each connection reaches its end exactly when its worker exits
+                self.workers.append(worker)
+                connections.append(reader)
+                self.jobs_completed[worker.pid] = 0
+        except BaseException:
+            self._stop_workers()
+            raise
+        finally:
+            gc.unfreeze()
+        self._collector_thread = threading.Thread(target=self._collect_results, args=(connections,), daemon=True)
+        self._collector_thread.start()
+
+    def _collect_results(self, connections):
+        """Runs in a background thread in this process: resolves futures with the results sent by the workers, and fails the jobs of workers that exit unexpectedly."""
+        pending = {connection: worker for connection, worker in zip(connections, self.workers)}
+        while pending:
+            for connection in multiprocessing.connection.wait(list(pending)):
+                worker = pending[connection]
+                try:
+                    kind, job_id, payload = connection.recv()
+                except EOFError:  # the worker exited, and every result it sent has been read
+                    del pending[connection]
+                    connection.close()
+                    worker.join()
+                    with self._lock:
+                        job_id = self._current_jobs.pop(worker.pid, None)
+                        future = None if job_id is None else self._futures.pop(job_id, None)
+                    if future is not None:
+                        future.set_exception(RequestError("recognition worker process {} exited with code {}".format(worker.pid, worker.exitcode)))
+                    continue
+                with self._lock:
+                    if kind == "started":
+                        self._current_jobs[worker.pid] = job_id
+                        continue
+                    del self._current_jobs[worker.pid]
+                    self.jobs_completed[worker.pid] += 1
+                    future = self._futures.pop(job_id)
+                if kind == "result":
+                    future.set_result(payload)
+                else:
+                    future.set_exception(payload)
+        with self._lock:  # every worker has exited, so jobs still waiting will never run
+            futures, self._futures = list(self._futures.values()), {}
+            self._closed = True
+        for future in futures:
+            future.set_exception(RequestError("recognition worker pool is closed"))
+
+    def submit(self, audio_data, engine, **options):
+        """
+        Queues ``audio_data`` (an ``AudioData`` instance) for recognition with ``recognizer.recognize_<engine>(audio_data, **options)`` in a worker process, and returns a ``concurrent.futures.Future`` for the result.
+        """
+        assert isinstance(audio_data, AudioData), "``audio_data`` must be audio data"
+        assert hasattr(self.recognizer, "recognize_" + engine), "``engine`` must be the name of a recognizer, like ``'sphinx'``"
+        future = concurrent.futures.Future()
+        with self._lock:
+            if self._closed: raise RequestError("recognition worker pool is closed")
+            job_id = next(self._job_ids)
+            self._futures[job_id] = future
+        try:
+            self._jobs.put((job_id, engine, audio_data, options))
+        except BaseException:  # the job couldn't be pickled, so no worker will ever resolve its future
+            with self._lock: self._futures.pop(job_id, None)
+            raise
+        return future
+
+    def recognize(self, audio_data, engine, **options):
+        """Recognizes ``audio_data`` in a worker process, and returns the result of ``recognizer.recognize_<engine>(audio_data, **options)``."""
+        return self.submit(audio_data, engine, **options).result()
+
+    def get_memory_usage(self):
+        """
+        Returns a list of dictionaries describing the memory usage of each live worker process, in bytes, with the keys ``"pid"``, ``"rss"`` (resident set size), ``"pss"`` (proportional set size, which divides shared pages between the processes sharing them), ``"shared"``, ``"private"``, and ``"jobs_completed"``.
+
+        Memory usage is read from ``/proc``, so values other than ``"pid"`` and ``"jobs_completed"`` are ``None`` on platforms without it. The RSS of each worker counts the shared models in full, so the PSS and private memory are the better measure of what each additional worker costs.
+        """
+        with self._lock:
+            jobs_completed = dict(self.jobs_completed)
+        return [dict(get_process_memory_usage(worker.pid), pid=worker.pid, jobs_completed=jobs_completed[worker.pid]) for worker in self.workers if worker.is_alive()]
+
+    def _stop_workers(self):
+        for _ in self.workers: self._jobs.put(None)
+        for worker in self.workers: worker.join()
+
+    def close(self):
+        """Stops the worker processes once they finish the jobs already submitted, and waits for them to exit."""
+        with self._lock:
+            if self._closed and not self._collector_thread.is_alive(): return
+            self._closed = True
+        self._stop_workers()
+        self._collector_thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
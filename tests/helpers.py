@@ -0,0 +1,10 @@
+import io
+import struct
+
+import speech_recognition as sr
+
+
+def make_source(*segments):
+    """Returns an ``AudioFile`` of 16 kHz audio made of ``(loud, duration)`` segments."""
+    frame_data = b"".join(struct.pack("<2h", 5000, -5000) * int(duration * 8000) if loud else b"\x00\x00" * int(duration * 16000) for loud, duration in segments)
+    return sr.AudioFile(io.BytesIO(sr.AudioData(frame_data, 16000, 2, 1).get_wav_data()))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import urlsplit
+
+import speech_recognition as sr
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            body = b""
+            while True:
+                chunk_size = int(self.rfile.readline().strip(), 16)
+                body += self.rfile.read(chunk_size)
+                self.rfile.readline()  # skip the CRLF after each chunk
+                if chunk_size == 0: break
+        else:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests.append((self.path, dict(self.headers), body))
+
+        status, response_body = self.server.responses.get(urlsplit(self.path).path, (404, b""))
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(response_body)))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAsyncio(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.AUDIO_FILE_EN = os.path.join(os.path.dirname(os.path.realpath(__file__)), "english.wav")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubRequestHandler)
+        self.server.requests, self.server.responses = [], {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def redirect_to_stub_server(self):
+        """Patches ``Recognizer._apost`` so that every asynchronous request is sent to the stub server, keeping the original path and query string."""
+        apost = sr.Recognizer._apost
+
+        async def redirected_apost(recognizer, url, *args, **kwargs):
+            parts = urlsplit(url)
+            return await apost(recognizer, "http://127.0.0.1:{}{}?{}".format(self.server.server_port, parts.path, parts.query), *args, **kwargs)
+        return mock.patch.object(sr.Recognizer, "_apost", redirected_apost)
+
+    async def test_alisten(self):
+        r = sr.Recognizer()
+        with sr.AudioFile(self.AUDIO_FILE_EN) as source: expected = r.listen(source)
+        r = sr.Recognizer()
+        with sr.AudioFile(self.AUDIO_FILE_EN) as source: audio = await r.alisten(source)
+        self.assertEqual(audio.get_raw_data(), expected.get_raw_data())
+        self.assertEqual(audio.sample_rate, expected.sample_rate)
+
+    async def test_alisten_options(self):
+        class SkippingHotwordDetector(object):
+            """Reads a second of audio as the hotword."""
+            def wait_for_hot_word(self, source, timeout=None):
+                return source.stream.read(source.SAMPLE_RATE), 1.0
+
+        for options in ({"endpointer": sr.Endpointer(min_pause=0.2)}, {"hotword_detector": SkippingHotwordDetector()}):
+            r = sr.Recognizer()
+            with sr.AudioFile(self.AUDIO_FILE_EN) as source: expected = r.listen(source, **options)
+            r = sr.Recognizer()
+            with sr.AudioFile(self.AUDIO_FILE_EN) as source: audio = await r.alisten(source, **options)
+            self.assertEqual(audio.get_raw_data(), expected.get_raw_data())  # phrases are detected by the same code
+
+    async def test_alisten_in_background(self):
+        r = sr.Recognizer()
+        phrases = [audio async for audio in r.alisten_in_background(sr.AudioFile(self.AUDIO_FILE_EN))]
+        self.assertGreaterEqual(len(phrases), 1)
+        self.assertTrue(all(len(audio.frame_data) > 0 for audio in phrases))
+
+    async def test_arecognize_wit(self):
+        self.server.responses["/speech"] = (200, json.dumps({"_text": "one two three"}).encode("utf-8"))
+        r = sr.Recognizer()
+        with sr.AudioFile(self.AUDIO_FILE_EN) as source: audio = r.record(source)
+        with self.redirect_to_stub_server():
+            self.assertEqual(await r.arecognize_wit(audio, key="KEY"), "one two three")
+            await r.aclose()
+
+        path, headers, body = self.server.requests[0]
+        self.assertEqual(headers["Authorization"], "Bearer KEY")
+        self.assertEqual(body, audio.get_wav_data(convert_width=2))
+
+    async def test_arecognize_google(self):
+        self.server.responses["/speech-api/v2/recognize"] = (200, b'{"result":[]}\n' + json.dumps({"result": [{"alternative": [{"transcript": "one two three", "confidence": 0.9}, {"transcript": "1 2 3"}]}]}).encode("utf-8"))
+        r = sr.Recognizer()
+        with sr.AudioFile(self.AUDIO_FILE_EN) as source: audio = r.record(source)
+        with self.redirect_to_stub_server():
+            self.assertEqual(await r.arecognize_google(audio, with_confidence=True), ("one two three", 0.9))
+            await r.aclose()
+
+        path, headers, body = self.server.requests[0]
+        self.assertIn("lang=en-US", path)
+        self.assertTrue(body.startswith(b"fLaC"))
+
+    async def test_arecognize_azure(self):
+        self.server.responses["/sts/v1.0/issueToken"] = (200, b"TOKEN")
+        self.server.responses["/speech/recognition/conversation/cognitiveservices/v1"] = (200, json.dumps({"RecognitionStatus": "Success", "NBest": [{"Display": "One two three.", "Confidence": 0.8}]}).encode("utf-8"))
+        r = sr.Recognizer()
+        with sr.AudioFile(self.AUDIO_FILE_EN) as source: audio = r.record(source)
+
+        with self.redirect_to_stub_server():
+            self.assertEqual(await r.arecognize_azure(audio, key="KEY"), ("One two three.", 0.8))
+            self.assertEqual(await r.arecognize_azure(audio, key="KEY"), ("One two three.", 0.8))
+            await r.aclose()
+
+        self.assertEqual([urlsplit(path).path for path, _, _ in self.server.requests], ["/sts/v1.0/issueToken", "/speech/recognition/conversation/cognitiveservices/v1", "/speech/recognition/conversation/cognitiveservices/v1"])
+        path, headers, body = self.server.requests[1]
+        self.assertEqual(headers["Authorization"], "Bearer TOKEN")
+        self.assertEqual(body, audio.get_wav_data(convert_rate=16000, convert_width=2))
+
+    async def test_arecognize_request_error(self):
+        self.server.responses["/speech"] = (500, b"")
+        r = sr.Recognizer()
+        with sr.AudioFile(self.AUDIO_FILE_EN) as source: audio = r.record(source)
+        with self.redirect_to_stub_server():
+            with self.assertRaises(sr.RequestError):
+                await r.arecognize_wit(audio, key="KEY")
+            await r.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
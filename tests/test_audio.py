@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 
+import audioop
+import struct
 import unittest
 from os import path
 
@@ -142,5 +144,75 @@ class TestAudioFile(unittest.TestCase):
             self.assertSimilar(audio.get_raw_data()[:32], b"\x00\x00\x00\x00\x00\x00\xfe\xff\x00\x00\x02\x00\x00\x00\xfe\xff\x00\x00\x00\x00\x00\xff\x01\x00\x00\x02\xfc\xff\x00\xfe\x01\x00")
 
 
+class TestRMSEnergies(unittest.TestCase):
+    def test_matches_audioop(self):
+        for sample_width in (1, 2, 3, 4):
+            with sr.AudioFile(path.join(path.dirname(path.realpath(__file__)), "audio-mono-32-bit-44100Hz.wav")) as source: audio = sr.Recognizer().record(source)
+            frame_data = audio.get_raw_data(convert_width=sample_width)[:sample_width * 1000 * 5 + 7]  # trailing partial frame should be ignored
+            energies = sr.audio.get_rms_energies(frame_data, sample_width, 1000)
+            self.assertEqual(len(energies), 5)
+            for i, energy in enumerate(energies):
+                self.assertAlmostEqual(energy, audioop.rms(frame_data[i * sample_width * 1000:(i + 1) * sample_width * 1000], sample_width), delta=1)
+
+
+class TestNoiseCalibration(unittest.TestCase):
+    def test_ignores_short_loud_sounds(self):
+        quiet_chunk, loud_chunk = struct.pack("<2h", 100, -100) * 512, struct.pack("<2h", 10000, -10000) * 512
+        audio = sr.AudioData(quiet_chunk * 10 + loud_chunk + quiet_chunk * 10, 16000, 2, 1)
+        r = sr.Recognizer()
+        calibration = r.adjust_for_ambient_noise(audio, method="percentile")
+        self.assertEqual(calibration, sr.NoiseCalibration(100, 0, 10000, 150))
+        self.assertEqual(r.energy_threshold, 150)
+
+    def test_source_matches_recorded_window(self):
+        r = sr.Recognizer()
+        with sr.AudioFile(path.join(path.dirname(path.realpath(__file__)), "english.wav")) as source:
+            calibration = r.adjust_for_ambient_noise(source, duration=0.5, method="percentile")
+            chunk_size = source.CHUNK
+        with sr.AudioFile(path.join(path.dirname(path.realpath(__file__)), "english.wav")) as source: audio = r.record(source, duration=0.5)
+        self.assertEqual(r.adjust_for_ambient_noise(audio, method="percentile", chunk_size=chunk_size), calibration)
+
+
+class TestFormatConversion(unittest.TestCase):
+    def test_requirements(self):
+        google = sr.Recognizer.format_requirements["google"]
+        self.assertEqual(google.get_target_format(48000, 2), (48000, 2))
+        self.assertEqual(google.get_target_format(4000, 4), (8000, 2))
+        self.assertEqual(sr.Recognizer.format_requirements["houndify"].get_target_format(44100, 2), (16000, 2))
+        self.assertEqual(sr.Recognizer.format_requirements["google_cloud"].get_target_format(96000, 1), (48000, 2))
+
+        audio = sr.AudioData(b"\x00\x00" * 1600, 16000, 2, 1)
+        self.assertEqual(sr.Recognizer.format_requirements["sphinx"].get_conversion(audio), {"convert_rate": None, "convert_width": None})
+        self.assertEqual(sr.Recognizer.format_requirements["ibm"].get_conversion(audio), {"convert_rate": None, "convert_width": None})
+
+    def test_incremental_conversion_matches_whole(self):
+        with sr.AudioFile(path.join(path.dirname(path.realpath(__file__)), "english.wav")) as source:
+            converter = sr.FormatConverter(source.SAMPLE_RATE, source.SAMPLE_WIDTH, 1, 16000, 2)
+            stream = sr.Microphone.ConvertedMicrophoneStream(source.stream, converter, 2)
+            chunks = []
+            while stream.get_read_available() > 0:
+                chunk = stream.read(1000)
+                if not chunk: break
+                chunks.append(chunk)
+        with sr.AudioFile(path.join(path.dirname(path.realpath(__file__)), "english.wav")) as source: audio = sr.Recognizer().record(source)
+        self.assertTrue(all(len(chunk) == 2000 for chunk in chunks[:-1]))
+        self.assertEqual(b"".join(chunks), audio.get_raw_data(convert_rate=16000, convert_width=2))
+
+
+class TestDownmix(unittest.TestCase):
+    def test_multichannel_audio_data(self):
+        frame_data = struct.pack("<4h", 100, 200, 300, -400) * 10 + b"\x00"  # trailing partial frame should be ignored
+        self.assertEqual(sr.AudioData(frame_data, 16000, 2, 4).get_raw_data(), struct.pack("<h", 50) * 10)
+        self.assertEqual(sr.audio.downmix_channels(frame_data, 2, 4, [2]), struct.pack("<h", 300) * 10)
+        self.assertEqual(sr.audio.downmix_channels(frame_data, 2, 4, [1, 2]), struct.pack("<h", 250) * 10)
+        self.assertEqual(sr.audio.downmix_channels(bytes([0, 128, 255]) * 10, 1, 3), bytes([127]) * 10)  # 8-bit samples are unsigned
+
+    def test_converter_channel_map(self):
+        converter = sr.FormatConverter(16000, 2, 8, 8000, 2, channel_map=[5])
+        frame_data = b"".join(struct.pack("<8h", *(i * 10 + channel for channel in range(8))) for i in range(100))
+        converted = converter.convert(frame_data)
+        self.assertEqual(converted, sr.AudioData(b"".join(struct.pack("<h", i * 10 + 5) for i in range(100)), 16000, 2, 1).get_raw_data(convert_rate=8000))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+import struct
+import threading
+import time
+import unittest
+from unittest import mock
+
+import speech_recognition as sr
+
+
+class FakeStream(object):
+    def __init__(self, host, input_device_index, rate, **kwargs):
+        self.host, self.device_index, self.rate = host, input_device_index, rate
+        self.stopped, self.closed = False, False
+
+    def read(self, size, exception_on_overflow=True):
+        if self.device_index in self.host.stuck_devices: self.host.unstuck.wait()
+        return struct.pack("<2h", 3000, -3000) * (size // 2) if self.device_index in self.host.loud_devices else b"\x00\x00" * size
+
+    def is_stopped(self):
+        return self.stopped
+
+    def stop_stream(self):
+        self.stopped = True
+
+    def close(self):
+        self.closed = True
+
+
+class FakePyAudio(object):
+    """Stands in for ``pyaudio.PyAudio``, with the devices given by ``FakePyAudio.devices``."""
+    devices = [
+        {"name": "Microphone", "maxInputChannels": 1, "defaultSampleRate": 44100.0},
+        {"name": "Speakers", "maxInputChannels": 0, "defaultSampleRate": 48000.0},
+        {"name": "Stuck Microphone", "maxInputChannels": 2, "defaultSampleRate": 16000.0},
+    ]
+    instances = []
+
+    def __init__(self):
+        self.devices = list(FakePyAudio.devices)
+        self.device_info_queries, self.terminated = 0, False
+        self.loud_devices, self.stuck_devices, self.unstuck = {0}, set(), threading.Event()
+        self.streams = []
+        FakePyAudio.instances.append(self)
+
+    def get_device_count(self):
+        return len(self.devices)
+
+    def get_device_info_by_index(self, device_index):
+        self.device_info_queries += 1
+        return dict(self.devices[device_index], index=device_index)
+
+    def get_default_input_device_info(self):
+        return self.get_device_info_by_index(0)
+
+    def open(self, **kwargs):
+        self.streams.append(FakeStream(self, **kwargs))
+        return self.streams[-1]
+
+    def terminate(self):
+        self.terminated = True
+
+
+class FakePyAudioModule(object):
+    __version__ = "0.2.14"
+    paInt16, paInputOverflow, paContinue = 8, 2, 0
+    PyAudio = FakePyAudio
+
+    @staticmethod
+    def get_sample_size(format):
+        return 2
+
+
+class TestDeviceRegistry(unittest.TestCase):
+    def setUp(self):
+        FakePyAudio.instances = []
+        patcher = mock.patch.multiple(sr.DeviceRegistry, _pyaudio_module=FakePyAudioModule, _host=None, _devices=None, _default_input_device=None, _open_streams=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached_device_info(self):
+        self.assertEqual(sr.Microphone.list_microphone_names(), ["Microphone", "Speakers", "Stuck Microphone"])
+        sr.Microphone(device_index=2)
+        sr.Microphone()
+        host, = FakePyAudio.instances  # a single host, shared by every microphone
+        self.assertEqual(host.device_info_queries, 4)  # each device once, plus the default input device
+        self.assertEqual(sr.DeviceRegistry.get_device_info(2)["name"], "Stuck Microphone")
+        self.assertEqual(host.device_info_queries, 4)
+
+    def test_refresh(self):
+        sr.DeviceRegistry.get_devices()
+        FakePyAudio.devices = FakePyAudio.devices + [{"name": "USB Microphone", "maxInputChannels": 1, "defaultSampleRate": 48000.0}]
+        self.addCleanup(setattr, FakePyAudio, "devices", FakePyAudio.devices[:-1])
+        self.assertEqual(len(sr.DeviceRegistry.get_devices()), 3)  # still cached
+        sr.DeviceRegistry.refresh()
+        self.assertTrue(FakePyAudio.instances[0].terminated)
+        self.assertEqual(sr.DeviceRegistry.get_devices()[3]["name"], "USB Microphone")
+        self.assertEqual(len(FakePyAudio.instances), 2)
+
+    def test_open_streams(self):
+        with sr.Microphone(device_index=0) as source:
+            self.assertEqual(sr.DeviceRegistry._open_streams, 1)
+            with self.assertRaises(AssertionError):
+                sr.DeviceRegistry.refresh()  # the stream belongs to the host that would be terminated
+            pyaudio_stream = source.stream.pyaudio_stream
+        self.assertTrue(pyaudio_stream.closed)
+        self.assertEqual(sr.DeviceRegistry._open_streams, 0)
+
+        microphone = sr.Microphone(device_index=0)
+        microphone.set_capture_format(16000, 2)
+        with mock.patch.object(sr, "FormatConverter", side_effect=RuntimeError("unsupported format")):
+            with self.assertRaises(RuntimeError):
+                with microphone: pass
+        self.assertIsNone(microphone.stream)
+        self.assertTrue(FakePyAudio.instances[0].streams[-1].closed)  # the stream opened before the error was closed
+        self.assertEqual(sr.DeviceRegistry._open_streams, 0)
+        sr.DeviceRegistry.refresh()
+
+    def test_probe_timeout(self):
+        host = sr.DeviceRegistry.get_host()
+        host.stuck_devices.add(2)
+        existing_threads = set(threading.enumerate())
+        start_time = time.monotonic()
+        result = sr.DeviceRegistry.probe(timeout=0.3, duration=0.1)
+        self.assertLess(time.monotonic() - start_time, 1)
+        self.assertEqual(list(result), [0])  # the device without input channels isn't probed, and the stuck one timed out
+        self.assertGreater(result[0], 1000)
+        self.assertEqual(sr.Microphone.list_working_microphones(timeout=0.3), {0: "Microphone"})
+
+        stuck_streams = [stream for stream in host.streams if stream.device_index == 2]
+        self.assertEqual(len(stuck_streams), 2)
+        self.assertTrue(all(stream.closed for stream in stuck_streams))  # closed when the probes timed out
+        self.assertEqual(sr.DeviceRegistry._open_streams, 0)
+        sr.DeviceRegistry.refresh()
+        self.assertTrue(host.terminated)
+
+        recording_threads = set(threading.enumerate()) - existing_threads
+        host.unstuck.set()
+        for thread in recording_threads: thread.join()
+        self.assertEqual(sr.DeviceRegistry._open_streams, 0)  # the stuck recordings didn't close their streams a second time
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+import unittest
+
+import speech_recognition as sr
+from tests.helpers import make_source
+
+
+class TestEndpointing(unittest.TestCase):
+    def setUp(self):
+        self.r = sr.Recognizer()
+        self.r.dynamic_energy_threshold = False
+
+    def test_fast_speech_ends_sooner(self):
+        segments = [(False, 0.1), (True, 0.3), (False, 0.1), (True, 0.3), (False, 0.1), (True, 0.3), (False, 2)]
+        with make_source(*segments) as source:
+            baseline = self.r.listen(source)
+            baseline_position = source.stream.audio_reader.tell()
+        endpointer = sr.Endpointer()
+        with make_source(*segments) as source:
+            audio = self.r.listen(source, endpointer=endpointer)
+            position = source.stream.audio_reader.tell()
+
+        self.assertEqual(endpointer.pause_duration, 0.5)  # 3 times the 0.1 second pauses between words, but no less than ``min_pause``
+        self.assertLess(position, baseline_position)
+        self.assertEqual(audio.get_raw_data(), baseline.get_raw_data()[:len(audio.get_raw_data())])
+        self.assertAlmostEqual(len(audio.get_raw_data()) // 2, int(1.2 * 16000), delta=160)  # ends within 10 milliseconds of where the speech ends, rather than at a chunk boundary
+        self.assertAlmostEqual(endpointer.phrase_duration, 1.2 - 4096 / 16000, delta=0.01)  # measured from the end of the 4096-sample chunk where speaking started
+
+    def test_early_commit(self):
+        commits = []
+
+        def early_commit(endpointer, silence_duration):
+            commits.append(silence_duration)
+            return True
+        with make_source((True, 1), (False, 2), (True, 0.5)) as source:
+            audio = self.r.listen(source, endpointer=sr.Endpointer(min_pause=0.2, early_commit=early_commit))
+            position = source.stream.audio_reader.tell()
+        self.assertEqual(len(commits), 1)
+        self.assertGreaterEqual(commits[0], 0.2)
+        self.assertLess(position, int(1.5 * 16000))
+        self.assertAlmostEqual(len(audio.get_raw_data()) // 2, 16000, delta=160)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import logging
+import unittest
+
+import speech_recognition as sr
+from tests.helpers import make_source
+
+
+class TestMetrics(unittest.TestCase):
+    def test_prometheus_format(self):
+        metrics = sr.Metrics(buckets=(0.1, 1))
+        metrics.increment("bytes_uploaded_total", 100, engine="google")
+        metrics.increment("bytes_uploaded_total", 50, engine="google")
+        metrics.set_gauge("audio_energy", 42)
+        metrics.observe("stage_seconds", 0.5, stage="parse", engine="wit")
+        metrics.observe("stage_seconds", 5, stage="parse", engine="wit")
+        self.assertEqual(metrics.to_prometheus(), "\n".join([
+            "# TYPE speech_recognition_bytes_uploaded_total counter",
+            'speech_recognition_bytes_uploaded_total{engine="google"} 150',
+            "# TYPE speech_recognition_audio_energy gauge",
+            "speech_recognition_audio_energy 42",
+            "# TYPE speech_recognition_stage_seconds histogram",
+            'speech_recognition_stage_seconds_bucket{engine="wit",stage="parse",le="0.1"} 0',
+            'speech_recognition_stage_seconds_bucket{engine="wit",stage="parse",le="1.0"} 1',
+            'speech_recognition_stage_seconds_bucket{engine="wit",stage="parse",le="+Inf"} 2',
+            'speech_recognition_stage_seconds_sum{engine="wit",stage="parse"} 5.5',
+            'speech_recognition_stage_seconds_count{engine="wit",stage="parse"} 2',
+        ]) + "\n")
+
+        metrics.reset()
+        self.assertEqual(metrics.to_prometheus(), "\n")
+
+    def test_hooks_and_structured_log(self):
+        metrics, events = sr.Metrics(), []
+        metrics.add_hook(events.append)
+        with self.assertLogs("speech_recognition.metrics", logging.INFO) as logs:
+            metrics.add_hook(sr.StructuredLogHook(names=["stage_seconds"]))
+            with metrics.measure("convert", engine="sphinx"):
+                sr.AudioData(b"\x00\x00" * 16000, 16000, 2, 1).get_raw_data(convert_rate=8000)
+            metrics.set_gauge("audio_energy", 0)
+        self.assertEqual([(event["name"], event["labels"]) for event in events], [
+            ("stage_seconds", {"stage": "convert", "engine": "sphinx"}),  # recorded by ``AudioData`` inside the measured stage
+            ("stage_seconds", {"stage": "convert", "engine": "sphinx"}),
+            ("audio_energy", {}),
+        ])
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(json.loads(logs.records[0].getMessage())["labels"], {"stage": "convert", "engine": "sphinx"})
+
+
+class TestListenInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.r = sr.Recognizer()
+        self.r.dynamic_energy_threshold = False
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(self.r.metrics)
+        with make_source((False, 0.5), (True, 1), (False, 1)) as source:
+            self.r.listen(source)
+
+    def test_listen(self):
+        self.r.metrics = sr.Metrics()
+        with make_source((False, 0.5), (True, 1), (False, 1)) as source:
+            self.r.listen(source)
+        counters, gauges, histograms = self.r.metrics.counters, self.r.metrics.gauges, self.r.metrics.histograms
+        speech, silence = counters[("vad_decisions_total", (("decision", "speech"),))], counters[("vad_decisions_total", (("decision", "silence"),))]
+        self.assertGreater(speech, 0)
+        self.assertGreater(silence, 0)
+        self.assertEqual(histograms[("stage_seconds", (("stage", "stream_read"),))][2], speech + silence + 1)  # the last read reaches the end of the file
+        self.assertEqual(gauges[("energy_threshold", ())], 300)
+
+    def test_alisten(self):
+        self.r.metrics = sr.Metrics()
+        with make_source((False, 0.5), (True, 1), (False, 1)) as source:
+            asyncio.run(self.r.alisten(source))
+        self.assertGreater(self.r.metrics.counters[("vad_decisions_total", (("decision", "speech"),))], 0)
+
+    def test_executor_keeps_stage_labels(self):
+        self.r.metrics = sr.Metrics()
+        audio = sr.AudioData(b"\x00\x00" * 16000, 16000, 2, 1)
+
+        async def convert():
+            with self.r._measure("encode", engine="wit"):
+                await self.r._arun_in_executor(audio.get_raw_data, 8000)
+        asyncio.run(convert())
+        self.assertIn(("stage_seconds", (("engine", "wit"), ("stage", "convert"))), self.r.metrics.histograms)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import os
+import unittest
+
+import speech_recognition as sr
+
+
+class TestAudioSourceMultiplexer(unittest.TestCase):
+    def setUp(self):
+        self.AUDIO_FILE_EN = os.path.join(os.path.dirname(os.path.realpath(__file__)), "english.wav")
+        self.AUDIO_FILE_FR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "french.aiff")
+
+    def test_phrases_are_tagged_by_source(self):
+        r = sr.Recognizer()
+        sources = [sr.AudioFile(self.AUDIO_FILE_EN), sr.AudioFile(self.AUDIO_FILE_FR), sr.AudioFile(self.AUDIO_FILE_EN)]
+        phrases = []
+        with sr.AudioSourceMultiplexer(r, sources, lambda source, audio: phrases.append((source, audio))) as multiplexer:
+            while multiplexer.states: multiplexer.poll()
+
+        self.assertEqual(sorted(sources.index(source) for source, _ in phrases), [0, 1, 2])
+        english_phrases = [audio.get_raw_data() for source, audio in phrases if source is not sources[1]]
+        self.assertEqual(english_phrases[0], english_phrases[1])
+
+    def test_matches_listen(self):
+        r = sr.Recognizer()
+        with sr.AudioFile(self.AUDIO_FILE_EN) as source: expected = r.listen(source)
+
+        phrases = []
+        with sr.AudioSourceMultiplexer(sr.Recognizer(), [sr.AudioFile(self.AUDIO_FILE_EN)], lambda source, audio: phrases.append(audio)) as multiplexer:
+            while multiplexer.states: multiplexer.poll()
+        self.assertEqual([audio.get_raw_data() for audio in phrases], [expected.get_raw_data()])
+
+    def test_live_source_ends(self):
+        with sr.AudioFile(self.AUDIO_FILE_EN) as source: frame_data = source.stream.read(-1)
+        frame_data = frame_data[:len(frame_data) // 2 + 3 * 2]  # ends in the middle of the phrase, and of a chunk
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        phrases = []
+        source = sr.RawStreamSource(read_fd, 44100, chunk_size=1024, buffer_size=len(frame_data))
+        with sr.AudioSourceMultiplexer(sr.Recognizer(), [source], lambda source, audio: phrases.append(audio)) as multiplexer:
+            for i in range(0, len(frame_data), 8192):
+                os.write(write_fd, frame_data[i:i + 8192])
+                multiplexer.poll()
+            os.close(write_fd)
+            for _ in range(10):
+                if not multiplexer.states: break
+                multiplexer.poll()
+            self.assertEqual(multiplexer.states, [])
+        self.assertEqual(len(phrases), 1)  # the phrase in progress was emitted when the stream ended
+        self.assertTrue(frame_data.endswith(phrases[0].get_raw_data()))
+
+    def test_states_do_not_share_energy_threshold(self):
+        r = sr.Recognizer()
+        r.energy_threshold = 4000
+        sources = [sr.AudioFile(self.AUDIO_FILE_EN), sr.AudioFile(self.AUDIO_FILE_FR)]
+        with sr.AudioSourceMultiplexer(r, sources, lambda source, audio: None) as multiplexer:
+            states = list(multiplexer.states)
+            multiplexer.poll()
+        self.assertEqual(r.energy_threshold, 4000)
+        self.assertNotEqual(states[0].energy_threshold, 4000)
+        self.assertNotEqual(states[0].energy_threshold, states[1].energy_threshold)
+
+    def test_listener_state_phrase_time_limit(self):
+        r = sr.Recognizer()
+        with sr.AudioFile(self.AUDIO_FILE_EN) as source:
+            state = sr.ListenerState(r, source, phrase_time_limit=0.5)
+            phrase_buffers = []
+            for i in range(13):
+                audio = state.process(b"\x00\x00" * source.CHUNK, 10000)  # constant loud audio never pauses
+                if audio is not None: phrase_buffers.append(len(audio.frame_data) // (2 * source.CHUNK))
+        self.assertEqual(phrase_buffers, [6, 6])  # 5 chunks fit in the time limit, plus the chunk that started each phrase
+
+
+if __name__ == "__main__":
+    unittest.main()
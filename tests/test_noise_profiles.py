@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import shutil
+import struct
+import tempfile
+import time
+import unittest
+
+import speech_recognition as sr
+
+
+class TestNoiseProfiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "profiles", "noise_profiles.json")
+
+    def test_store_round_trip(self):
+        key = sr.NoiseProfileStore.get_key("USB Microphone", None, 16000)
+        self.assertEqual(key, "USB Microphone|default|16000")
+        self.assertIsNone(sr.NoiseProfileStore(self.path).get(key))
+
+        profile = sr.NoiseProfileStore(self.path).put(key, sr.NoiseCalibration(100, 5, 400, 150))
+        self.assertEqual(profile["energy_threshold"], 150)
+        self.assertEqual(sr.NoiseProfileStore(self.path).get(key), profile)  # a new store loads the profile from disk
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["noise_profiles.json"])  # no temporary files left behind
+
+    def test_listen_refreshes_profile(self):
+        store = sr.NoiseProfileStore(self.path)
+        quiet_chunk = struct.pack("<2h", 100, -100) * 512
+        silence = io.BytesIO(sr.AudioData(quiet_chunk * 16, 16000, 2, 1).get_wav_data())
+        r = sr.Recognizer()
+        with sr.AudioFile(silence) as source:
+            source.noise_profile_store, source.noise_profile_key = store, "silence"
+            with self.assertRaises(sr.WaitTimeoutError):
+                r.listen(source, timeout=0.6)
+
+        for _ in range(100):  # the profile is written by a background thread
+            profile = store.get("silence")
+            if profile is not None: break
+            time.sleep(0.01)
+        self.assertIsNotNone(profile)
+        self.assertEqual(r.load_noise_profile(source), profile)
+        self.assertEqual(r.energy_threshold, profile["energy_threshold"])
+
+    def test_refresh_uses_recent_silence(self):
+        store = sr.NoiseProfileStore(self.path)
+        hum, quiet = struct.pack("<2h", 2000, -2000) * 8000, struct.pack("<2h", 100, -100) * 8000  # one second each
+        r = sr.Recognizer()
+        r.energy_threshold, r.dynamic_energy_threshold = 10000, False  # neither counts as speech
+        with sr.AudioFile(io.BytesIO(sr.AudioData(hum * 20 + quiet * 6, 16000, 2, 1).get_wav_data())) as source:
+            source.noise_profile_store, source.noise_profile_key = store, "hum"
+            with self.assertRaises(sr.WaitTimeoutError):
+                r.listen(source, timeout=25.9)
+
+        for _ in range(100):  # the profile is written by a background thread
+            profile = store.get("hum")
+            if profile is not None: break
+            time.sleep(0.01)
+        self.assertLess(profile["noise_floor"], 200)  # only the last few seconds are used, not the whole wait
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+import os
+import socket
+import struct
+import threading
+import unittest
+
+import speech_recognition as sr
+
+
+def make_rtp_packet(sequence_number, payload, payload_type=11):
+    """Returns an RTP packet carrying ``payload``, with a timestamp derived from ``sequence_number``."""
+    return struct.pack(">BBHII", 0x80, payload_type, sequence_number & 0xFFFF, (sequence_number * 160) & 0xFFFFFFFF, 1234) + payload
+
+
+class TestRawStreamSource(unittest.TestCase):
+    def setUp(self):
+        self.quiet_chunk, self.loud_chunk = struct.pack("<2h", 10, -10) * 512, struct.pack("<2h", 5000, -5000) * 512
+        self.audio = self.quiet_chunk * 5 + self.loud_chunk * 10 + self.quiet_chunk * 20
+
+    def test_socket(self):
+        sender, receiver = socket.socketpair()
+        self.addCleanup(sender.close)
+        self.addCleanup(receiver.close)
+
+        def send():
+            for i in range(0, len(self.audio), 1000): sender.sendall(self.audio[i:i + 1000])  # split so chunks don't line up with packets
+            sender.close()
+        threading.Thread(target=send).start()
+        r = sr.Recognizer()
+        r.dynamic_energy_threshold = False
+        with sr.RawStreamSource(receiver, 16000, buffer_size=4096) as source:
+            audio = r.listen(source)
+            self.assertEqual(audio.get_raw_data(), self.audio[:len(audio.get_raw_data())])
+            self.assertGreater(len(audio.get_raw_data()), len(self.loud_chunk) * 10)
+            rest = source.stream.read(100000)  # everything after the pause that ended the phrase
+            self.assertTrue(len(rest) > 0 and self.audio.endswith(rest))
+            self.assertEqual(source.stream.read(1024), b"")  # the other end closed the connection
+
+    def test_pipe_non_blocking(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        with sr.RawStreamSource(read_fd, 16000, chunk_size=512) as source:
+            self.assertEqual(source.stream.get_read_available(), 0)  # doesn't block when nothing has been written yet
+            os.write(write_fd, self.loud_chunk + b"\x00")  # trailing partial frame isn't available yet
+            self.assertEqual(source.stream.get_read_available(), 1024)
+            self.assertEqual(source.stream.read(1024), self.loud_chunk)
+            os.close(write_fd)
+            self.assertEqual(source.stream.read(1024), b"")
+
+
+class TestRTPJitterBuffer(unittest.TestCase):
+    def test_reordering_and_loss(self):
+        jitter_buffer = sr.RTPJitterBuffer(8000, delay=0.04)  # 2 packets of 160 samples
+        payloads = [struct.pack(">h", 100 * (i + 1)) * 160 for i in range(6)]
+        for sequence_number in (65534, 0, 65535):  # out of order, and wrapping around
+            self.assertTrue(jitter_buffer.push(make_rtp_packet(sequence_number, payloads[(sequence_number + 2) % 65536])))
+        self.assertFalse(jitter_buffer.push(make_rtp_packet(0, payloads[2])))
+        self.assertEqual(jitter_buffer.duplicates, 1)
+
+        played = []
+        audio = jitter_buffer.pop()
+        while audio is not None:
+            played.append(audio)
+            audio = jitter_buffer.pop()
+        self.assertEqual(played, [audioop_byteswap(payload) for payload in payloads[:3]])
+
+        jitter_buffer.push(make_rtp_packet(2, payloads[4]))  # packet 1 never arrives
+        self.assertIsNone(jitter_buffer.pop())  # it might still arrive
+        jitter_buffer.push(make_rtp_packet(3, payloads[5]))
+        self.assertEqual(jitter_buffer.pop(), struct.pack("<h", 150) * 160)  # now it's considered lost, and is concealed with the previous packet at half volume
+        self.assertEqual(jitter_buffer.pop(), audioop_byteswap(payloads[4]))
+        self.assertEqual(jitter_buffer.lost, 1)
+        self.assertFalse(jitter_buffer.push(make_rtp_packet(1, payloads[3])))  # arrived too late
+        self.assertEqual(jitter_buffer.late, 1)
+
+    def test_udp_source(self):
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(receiver.close)
+        receiver.bind(("127.0.0.1", 0))
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(sender.close)
+        payloads = [struct.pack(">h", i) * 160 for i in range(10)]
+        for sequence_number in (0, 2, 1, 3, 5, 4, 6, 7, 8, 9):
+            sender.sendto(make_rtp_packet(sequence_number, payloads[sequence_number]), receiver.getsockname())
+
+        with sr.RawStreamSource(receiver, 8000, chunk_size=160, rtp=True, jitter_delay=0.02) as source:
+            audio = source.stream.read(160 * 8)
+            self.assertEqual(audio, b"".join(audioop_byteswap(payload) for payload in payloads[:8]))
+            self.assertEqual(source.jitter_buffer.lost, 0)
+            self.assertEqual(source.stream.read(160 * 3)[-320:], b"\x00\x00" * 160)  # silence is played once the packets stop
+
+
+def audioop_byteswap(payload):
+    return b"".join(payload[i + 1:i + 2] + payload[i:i + 1] for i in range(0, len(payload), 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
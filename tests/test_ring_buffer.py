@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+import unittest
+
+import speech_recognition as sr
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_wraps_around(self):
+        ring_buffer = sr.RingBuffer(8)
+        self.assertEqual(ring_buffer.write(b"abcdef"), 6)
+        self.assertEqual(ring_buffer.read(4), b"abcd")
+        self.assertEqual(ring_buffer.write(b"ghijkl"), 6)  # wraps around the end of the buffer
+        buffer = bytearray(8)
+        self.assertEqual(ring_buffer.readinto(buffer), 8)
+        self.assertEqual(buffer, b"efghijkl")
+        self.assertEqual((ring_buffer.overruns, ring_buffer.underruns), (0, 0))
+
+    def test_overrun_and_underrun(self):
+        ring_buffer = sr.RingBuffer(4)
+        self.assertEqual(ring_buffer.write(b"abcdef"), 4)  # the data that doesn't fit is dropped
+        self.assertEqual((ring_buffer.overruns, ring_buffer.dropped_bytes), (1, 2))
+        self.assertEqual(ring_buffer.read(8, timeout=0.01), b"abcd")  # waits for more data, then times out
+        self.assertEqual((ring_buffer.waits, ring_buffer.underruns), (1, 1))
+        self.assertGreater(ring_buffer.wait_seconds, 0.005)
+
+        threading.Timer(0.02, ring_buffer.write, [b"efgh"]).start()
+        self.assertEqual(ring_buffer.read(4), b"efgh")  # waiting for data that arrives isn't an underrun
+        self.assertEqual((ring_buffer.waits, ring_buffer.underruns), (2, 1))
+
+        ring_buffer.close()
+        self.assertEqual(ring_buffer.read(4), b"")  # closed buffers don't wait
+
+    def test_producer_consumer(self):
+        ring_buffer = sr.RingBuffer(1000)
+        data = bytes(range(256)) * 400
+
+        def produce():
+            for i in range(0, len(data), 300):
+                while ring_buffer.available() > 700: time.sleep(0.001)  # wait for room, so nothing is dropped
+                ring_buffer.write(data[i:i + 300])
+            ring_buffer.close()
+        producer = threading.Thread(target=produce)
+        producer.start()
+        received = bytearray()
+        while True:
+            chunk = ring_buffer.read(128)
+            received += chunk
+            if len(chunk) < 128: break
+        producer.join()
+        self.assertEqual(bytes(received), data)
+        self.assertEqual((ring_buffer.overruns, ring_buffer.underruns), (0, 0))  # the short read at the end is the buffer closing
+
+
+if __name__ == "__main__":
+    unittest.main()
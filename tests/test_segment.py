@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import os
+import struct
+import unittest
+
+import speech_recognition as sr
+
+
+class TestSegment(unittest.TestCase):
+    def setUp(self):
+        self.AUDIO_FILE_EN = os.path.join(os.path.dirname(os.path.realpath(__file__)), "english.wav")
+
+    def test_matches_listen(self):
+        r = sr.Recognizer()
+        r.dynamic_energy_threshold = False
+        with sr.AudioFile(self.AUDIO_FILE_EN) as source: expected = r.listen(source)
+        with sr.AudioFile(self.AUDIO_FILE_EN) as source: segments = r.segment(source)
+        self.assertEqual(len(segments), 1)
+        self.assertTrue(expected.get_raw_data().endswith(segments[0].get_raw_data()))  # ``listen`` also keeps the audio before the phrase starts
+        self.assertEqual(r.energy_threshold, 300)
+
+    def test_audio_data_and_offsets(self):
+        quiet_chunk, loud_chunk = struct.pack("<2h", 10, -10) * 512, struct.pack("<2h", 5000, -5000) * 512
+        frame_data = quiet_chunk * 5 + loud_chunk * 10 + quiet_chunk * 20 + loud_chunk * 3 + quiet_chunk * 20 + loud_chunk * 10
+        r = sr.Recognizer()
+        audio = sr.AudioData(frame_data, 16000, 2, 1)
+
+        # the 3-chunk phrase is shorter than ``phrase_threshold``, so it is dropped; the last phrase is cut off by the end of the audio
+        offsets = r.segment(audio, chunk_size=1024, offsets_only=True)
+        self.assertEqual(offsets, [(5 * 1024, 15 * 1024), (58 * 1024, 68 * 1024)])
+        segments = r.segment(audio, chunk_size=1024)
+        self.assertEqual([segment.get_raw_data() for segment in segments], [frame_data[start * 2:end * 2] for start, end in offsets])
+
+        # phrases longer than ``phrase_time_limit`` are cut off after the starting chunk plus 6 chunks of 0.064 seconds; the rest of the first phrase is then too short to keep, but the rest of the last phrase reaches the end of the audio
+        self.assertEqual(r.segment(audio, phrase_time_limit=0.4, chunk_size=1024, offsets_only=True), [(5 * 1024, 12 * 1024), (58 * 1024, 65 * 1024), (65 * 1024, 68 * 1024)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import speech_recognition as sr
+
+FAKE_SNOWBOYDETECT = '''
+detectors = []
+
+
+class SnowboyDetect(object):
+    """Stands in for the Snowboy detector, "detecting" a hotword in audio containing a full-scale sample."""
+    def __init__(self, resource_filename, model_str):
+        self.resets, self.detections = 0, []  # audio passed to each detection
+        detectors.append(self)
+
+    def SetAudioGain(self, gain):
+        pass
+
+    def SetSensitivity(self, sensitivity):
+        self.sensitivity = sensitivity
+
+    def SampleRate(self):
+        return 16000
+
+    def Reset(self):
+        self.resets += 1
+
+    def RunDetection(self, data):
+        self.detections.append(data)
+        return 1 if b"\\xff\\x7f" in data else 0
+'''
+
+
+def make_source(sample_count, hotword_at=None):
+    """Returns an ``AudioFile`` of 16 kHz audio with distinct samples, with a full-scale sample at ``hotword_at`` if it isn't ``None``."""
+    samples = [i % 30000 for i in range(sample_count)]
+    if hotword_at is not None: samples[hotword_at] = 32767
+    return sr.AudioFile(io.BytesIO(sr.AudioData(struct.pack("<{}h".format(sample_count), *samples), 16000, 2, 1).get_wav_data()))
+
+
+class TestSnowboySession(unittest.TestCase):
+    def setUp(self):
+        self.snowboy_location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.snowboy_location)
+        with open(os.path.join(self.snowboy_location, "snowboydetect.py"), "w") as f: f.write(FAKE_SNOWBOYDETECT)
+        self.hot_word_file = os.path.join(self.snowboy_location, "computer.umdl")
+        with open(self.hot_word_file, "w") as f: f.write("model")
+
+        patcher = mock.patch.dict(sr.SnowboySession._sessions, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(sys.modules.pop, "snowboydetect", None)
+        self.session = sr.SnowboySession.get(self.snowboy_location, [self.hot_word_file])
+        self.detectors = self.session.snowboydetect.detectors
+
+    def test_shared_sessions(self):
+        self.assertIs(sr.SnowboySession.get(self.snowboy_location, [self.hot_word_file], 0.4), self.session)
+        self.assertIsNot(sr.SnowboySession.get(self.snowboy_location, [self.hot_word_file], 0.6), self.session)
+
+    def test_thread_local_detectors(self):
+        self.session.check_interval = -1  # run the detector on every chunk
+        with make_source(16000, hotword_at=12000) as source:
+            frame_data, elapsed_time = self.session.wait_for_hot_word(source)
+            self.assertEqual(len(frame_data), 2 * 3 * source.CHUNK)  # stopped at the chunk with the hotword
+            self.assertAlmostEqual(elapsed_time, 3 * source.CHUNK / 16000)
+            self.session.wait_for_hot_word(source)  # runs until the end of the stream
+        self.assertEqual(len(self.detectors), 1)
+        self.assertEqual(self.detectors[0].resets, 1)  # the detector was kept for the second call on the same source
+
+        with make_source(16000) as source: self.session.wait_for_hot_word(source)
+        self.assertEqual(self.detectors[0].resets, 2)  # reset for the new source
+
+        with make_source(16000) as source:
+            thread = threading.Thread(target=self.session.wait_for_hot_word, args=(source,))
+            thread.start()
+            thread.join()
+        self.assertEqual(len(self.detectors), 2)  # the other thread got its own detector
+
+    def test_rolling_buffer(self):
+        self.session.check_interval = float("inf")  # never run the detector, so the buffer fills up
+        with make_source(32000) as source:
+            with self.assertRaises(sr.WaitTimeoutError):
+                self.session.wait_for_hot_word(source, timeout=1.5)
+            state = self.session._local
+            read_samples = 5 * source.CHUNK  # chunks read before timing out
+            self.assertEqual(state.buffer_length, len(state.buffer))
+            self.assertEqual(len(state.buffer), 2 * 8000)  # 0.5 seconds at the detector's sample rate
+            expected = [i % 30000 for i in range(read_samples - 8000, read_samples)]
+            self.assertEqual(list(struct.unpack("<8000h", bytes(state.buffer))), expected)  # the most recent audio, in order
+
+            self.session.check_interval = -1
+            self.session.wait_for_hot_word(source)
+        read_samples += source.CHUNK
+        self.assertEqual(self.detectors[0].detections[0], struct.pack("<8000h", *[i % 30000 for i in range(read_samples - 8000, read_samples)]))  # the buffer carried over between calls
+        self.assertEqual(len(self.detectors[0].detections[1]), 2 * source.CHUNK)  # then only new audio is passed to the detector
+
+
+if __name__ == "__main__":
+    unittest.main()
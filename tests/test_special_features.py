@@ -19,6 +19,18 @@ class TestSpecialFeatures(unittest.TestCase):
         self.assertEqual(r.recognize_sphinx(audio, keyword_entries=[("wan", 0.95), ("too", 1.0), ("tree", 1.0)]), "tree too wan")
         self.assertEqual(r.recognize_sphinx(audio, keyword_entries=[("un", 0.95), ("to", 1.0), ("tee", 1.0)]), "tee to un")
 
+    def test_sphinx_keyword_spotter(self):
+        detections = []
+        spotter = sr.SphinxKeywordSpotter([("one", 1.0), ("two", 1.0), ("three", 1.0)], on_detection=lambda keyword, timestamp: detections.append((keyword, timestamp)))
+        r = sr.Recognizer()
+        with sr.AudioFile(self.AUDIO_FILE_EN) as source:
+            r.listen(source, hotword_detector=spotter)
+            duration = source.DURATION
+        self.assertEqual(detections, [spotter.last_detection])
+        keyword, timestamp = spotter.last_detection
+        self.assertIn(keyword, ("one", "two", "three"))
+        self.assertTrue(0 < timestamp <= duration)
+
     def assertSameWords(self, tested, reference, msg=None):
         set_tested = set(tested.split())
         set_reference = set(reference.split())
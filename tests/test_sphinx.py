@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import speech_recognition as sr
+from tests.helpers import make_source
+
+
+def make_models(directory):
+    """Creates placeholder model files for three languages in ``directory``, and returns their paths in the format of the ``language`` parameter of ``recognize_sphinx``."""
+    models = []
+    for language in ("en", "fr", "de"):
+        acoustic_parameters_directory = os.path.join(directory, language)
+        os.mkdir(acoustic_parameters_directory)
+        for name in ("mdef", "means"):
+            with open(os.path.join(acoustic_parameters_directory, name), "w") as f: f.write(language)
+        for path in (acoustic_parameters_directory + ".lm", acoustic_parameters_directory + ".dict"):
+            with open(path, "w") as f: f.write(language)
+        models.append((acoustic_parameters_directory, acoustic_parameters_directory + ".lm", acoustic_parameters_directory + ".dict"))
+    return models
+
+
+class Hypothesis(object):
+    def __init__(self, hypstr):
+        self.hypstr = hypstr
+
+
+class RecordingDecoder(object):
+    """Stands in for a PocketSphinx decoder, recording the searches it was switched to and the audio it decoded, which it "recognizes" as its length."""
+    def __init__(self, key):
+        self.key = key
+        self.search = "_default"
+        self.keyword_searches = []
+        self.utterances, self.in_utterance = [], False
+
+    def start_utt(self):
+        assert not self.in_utterance
+        self.utterances.append(b"")
+        self.in_utterance = True
+
+    def process_raw(self, data, no_search, full_utt):
+        assert self.in_utterance
+        self.utterances[-1] += data
+
+    def end_utt(self):
+        assert self.in_utterance
+        self.in_utterance = False
+
+    def hyp(self):
+        return Hypothesis("{} bytes".format(len(self.utterances[-1]))) if self.utterances and self.utterances[-1] else None
+
+    def set_kws(self, name, path):
+        with open(path) as f: self.keyword_searches.append((name, f.read()))
+
+    def get_search(self):
+        return self.search
+
+    def set_search(self, search):
+        self.search = search
+
+
+class RecordingDecoderCache(sr.SphinxDecoderCache):
+    def __init__(self, max_size=4, pool_size=1, timeout=None):
+        super().__init__(max_size, pool_size=pool_size, timeout=timeout)
+        self.loads, self.decoders = [], []
+
+    def _create_decoder(self, *key):
+        self.loads.append(key)
+        self.decoders.append(RecordingDecoder(key))
+        return self.decoders[-1]
+
+
+class TestSphinxDecoderCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.models = make_models(self.directory)
+
+    def test_reuse_and_eviction(self):
+        cache = RecordingDecoderCache(max_size=2)
+        with cache.acquire(*self.models[0]) as first: pass
+        with cache.acquire(*self.models[0]) as second: pass
+        self.assertIs(first, second)
+        with cache.acquire(*self.models[0], options={"-beam": 1e-60}) as decoder: self.assertIsNot(decoder, first)
+        with cache.acquire(*self.models[0]): pass
+
+        with cache.acquire(*self.models[1]): pass  # evicts the least recently used configuration, the one with the extra options
+        with cache.acquire(*self.models[0]) as decoder: self.assertIs(decoder, first)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (3, 3, 1))
+        self.assertEqual(len(cache.loads), 3)
+
+    def test_invalidation(self):
+        cache = RecordingDecoderCache()
+        with cache.acquire(*self.models[0]) as first: pass
+        with open(os.path.join(self.models[0][0], "means"), "w") as f: f.write("retrained")
+        with cache.acquire(*self.models[0]) as second: pass
+        self.assertIsNot(first, second)
+        self.assertEqual(cache.invalidations, 1)
+
+    def test_reset_between_utterances(self):
+        cache = RecordingDecoderCache()
+        with cache.acquire(*self.models[0]) as decoder:
+            decoder.set_search("keywords")
+        self.assertEqual(decoder.get_search(), "keywords")  # results of the keyword search can still be read
+        with cache.acquire(*self.models[0]) as decoder:
+            self.assertEqual(decoder.get_search(), "_default")
+
+        with self.assertRaises(RuntimeError):
+            with cache.acquire(*self.models[0]):
+                raise RuntimeError()
+        with cache.acquire(*self.models[0]) as reloaded: self.assertIsNot(reloaded, decoder)  # decoders are discarded if they fail mid-utterance
+        self.assertEqual(len(cache.loads), 2)
+
+    def test_detach(self):
+        cache = RecordingDecoderCache(pool_size=2)
+        with cache.acquire(*self.models[0]) as pooled: pass
+        with cache.acquire(*self.models[0], detach=True) as detached: pass
+        self.assertIs(detached, pooled)
+        with cache.acquire(*self.models[0]) as decoder: self.assertIsNot(decoder, detached)  # a new decoder was loaded in its place
+        self.assertEqual(cache.get_stats()[0]["loaded"], 1)
+
+        r = sr.Recognizer()
+        r.sphinx_decoder_cache = cache
+        result = r.recognize_sphinx(sr.AudioData(b"\x01\x00" * 100, 16000, 2, 1), language=self.models[0], show_all=True)
+        self.assertEqual(r.recognize_sphinx(sr.AudioData(b"\x01\x00" * 50, 16000, 2, 1), language=self.models[0]), "100 bytes")
+        self.assertEqual(result.hyp().hypstr, "200 bytes")  # the returned decoder isn't reused by later calls
+
+    def test_named_searches(self):
+        cache = RecordingDecoderCache()
+        cache.add_search("yes_no", keyword_entries=[("yes", 0.5), ("no", 1)])
+        cache.add_search("stop", keyword_entries=[("stop", 1)])
+        with self.assertRaises(ValueError):
+            with cache.acquire(*self.models[0], search="missing"): pass
+
+        for search in ("yes_no", "stop", "yes_no", None, "stop"):
+            with cache.acquire(*self.models[0], search=search) as decoder:
+                self.assertEqual(decoder.get_search(), "_default" if search is None else search)
+        self.assertEqual(decoder.keyword_searches, [("yes_no", "yes /1e-60.0/\nno /1e-10/\n"), ("stop", "stop /1e-10/\n")])  # each search is only set up once per decoder
+
+        cache.add_search("stop", keyword_entries=[("halt", 1)])
+        with cache.acquire(*self.models[0], search="stop"): pass
+        with cache.acquire(*self.models[1], search="stop") as other_decoder: pass
+        self.assertEqual(decoder.keyword_searches[-1], ("stop", "halt /1e-10/\n"))
+        self.assertEqual(other_decoder.keyword_searches, [("stop", "halt /1e-10/\n")])
+
+
+class TestSphinxDecoderPool(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.models = make_models(directory)
+
+    def check_out_concurrently(self, cache, thread_count, hold_time=0.1):
+        """Checks out a decoder for the first model from ``thread_count`` threads at once, each holding it for ``hold_time`` seconds, and returns the decoders they got."""
+        barrier, decoders = threading.Barrier(thread_count), []
+
+        def use_decoder():
+            barrier.wait()
+            with cache.acquire(*self.models[0]) as decoder:
+                decoders.append(decoder)
+                time.sleep(hold_time)
+        threads = [threading.Thread(target=use_decoder) for _ in range(thread_count)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        return decoders
+
+    def test_concurrent_checkouts(self):
+        cache = RecordingDecoderCache(pool_size=2)
+        decoders = self.check_out_concurrently(cache, 4)
+        self.assertEqual(len(set(map(id, decoders))), 2)  # the other two threads waited for a decoder to be checked in
+        self.assertEqual(len(cache.loads), 2)
+
+        stats, = cache.get_stats()
+        self.assertEqual((stats["pool_size"], stats["loaded"], stats["in_use"]), (2, 2, 0))
+        self.assertEqual((stats["checkouts"], stats["waits"], stats["timeouts"]), (4, 2, 0))
+        self.assertGreater(stats["wait_seconds"], 0.15)
+        self.assertGreater(stats["utilization"], 0.5)
+
+    def test_pool_size_per_configuration(self):
+        cache = RecordingDecoderCache()
+        cache.set_pool_size(*self.models[0], pool_size=3)
+        self.check_out_concurrently(cache, 3)
+        with cache.acquire(*self.models[1]): pass
+        self.assertEqual([stats["loaded"] for stats in cache.get_stats()], [3, 1])
+        self.assertEqual(cache.get_stats()[0]["waits"], 0)
+
+        cache.set_pool_size(*self.models[0], pool_size=None)  # idle decoders beyond the default size are unloaded
+        self.assertEqual(cache.get_stats()[0]["loaded"], 1)
+
+    def test_timeout(self):
+        cache = RecordingDecoderCache(timeout=0.05)
+        with cache.acquire(*self.models[0]):
+            with self.assertRaises(sr.RequestError):
+                with cache.acquire(*self.models[0]): pass
+            with cache.acquire(*self.models[1]): pass  # other configurations have their own pools
+        with cache.acquire(*self.models[0]): pass
+        self.assertEqual(cache.get_stats()[-1]["timeouts"], 1)  # the most recently used configuration is last
+        self.assertEqual(len(cache.loads), 2)
+
+
+class TestSphinxStreamingSession(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.r = sr.Recognizer()
+        self.r.dynamic_energy_threshold = False
+        self.r.sphinx_decoder_cache = RecordingDecoderCache()
+        self.language = make_models(directory)[0]
+
+    def test_listen(self):
+        partials = []
+        session = sr.SphinxStreamingSession(self.r, self.language, on_partial=partials.append)
+        with make_source((False, 0.5), (True, 0.1), (False, 2), (True, 1), (False, 1)) as source:
+            audio = self.r.listen(source, streaming_decoder=session)
+        decoder = self.r.sphinx_decoder_cache.decoders[0]
+        self.assertEqual(len(decoder.utterances), 2)  # the click was too short to be a phrase, and its utterance was abandoned
+        self.assertFalse(decoder.in_utterance)
+        self.assertTrue(decoder.utterances[-1].startswith(audio.get_raw_data()))  # followed by the pause that ended the phrase
+        self.assertEqual(session.hypothesis, "{} bytes".format(len(decoder.utterances[-1])))
+        self.assertGreater(len(partials), 2)
+        self.assertEqual(partials[-1], session.hypothesis)  # nothing is left to decode once the phrase ends
+        self.assertEqual(self.r.sphinx_decoder_cache.get_stats()[0]["in_use"], 0)  # the decoder was returned to the cache
+
+    def test_resampling(self):
+        session = sr.SphinxStreamingSession(self.r, self.language)
+        session.start(48000, 2, 2)
+        session.process(b"\x00\x00" * 2 * 4800)
+        self.assertEqual(session.finish(), "3200 bytes")  # 0.1 seconds of 16-bit mono 16 kHz audio
+        self.assertIsNone(session.finish())
+
+
+class RecordingGrammarCache(sr.CompiledGrammarCache):
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.builds = []
+
+    def _build_fsg(self, grammar, fsg_path, logmath):
+        time.sleep(0.05)  # give concurrent callers a chance to race
+        self.builds.append(grammar)
+        with open(fsg_path, "w") as f: f.write("FSG_BEGIN\nFSG_END\n")
+
+
+class TestCompiledGrammarCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.grammar = os.path.join(self.directory, "commands.jsgf")
+        self.write("commands.jsgf", "#JSGF V1.0;\ngrammar commands;\nimport <digits.*>;\npublic <commands> = call <digits.digit>;\n")
+        self.write("digits.gram", "#JSGF V1.0;\ngrammar digits;\npublic <digit> = one | two;\n")
+        os.chmod(self.directory, 0o555)  # compiled grammars must not be written next to the grammar
+        self.addCleanup(os.chmod, self.directory, 0o755)
+
+    def write(self, name, text):
+        with open(os.path.join(self.directory, name), "w") as f: f.write(text)
+
+    def test_cache_hits_and_invalidation(self):
+        cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_directory)
+        cache = RecordingGrammarCache(cache_directory)
+        fsg_path = cache.get_fsg_path(self.grammar, None)
+        self.assertEqual(os.path.dirname(fsg_path), cache_directory)
+        self.assertEqual(cache.get_fsg_path(self.grammar, None), fsg_path)
+        self.assertEqual(RecordingGrammarCache(cache_directory).get_fsg_path(self.grammar, None), fsg_path)  # found on disk by a new process
+        self.assertEqual((cache.memory_hits, cache.compilations), (1, 1))
+
+        os.chmod(self.directory, 0o755)
+        self.write("digits.gram", "#JSGF V1.0;\ngrammar digits;\npublic <digit> = one | two | three;\n")  # changing an imported grammar (its size changes, even if the modification time doesn't)
+        self.assertNotEqual(cache.get_fsg_path(self.grammar, None), fsg_path)
+        self.assertEqual(cache.compilations, 2)
+
+    def test_concurrent_compilation(self):
+        cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_directory)
+        caches = [RecordingGrammarCache(cache_directory) for _ in range(4)]  # separate caches share the directory like separate processes would
+        results = []
+        threads = [threading.Thread(target=lambda cache=cache: results.append(cache.get_fsg_path(self.grammar, None))) for cache in caches for _ in range(2)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(sum(len(cache.builds) for cache in caches), 1)
+        self.assertEqual(os.listdir(cache_directory), [os.path.basename(results[0])])
+        self.assertEqual(sum(cache.memory_hits + cache.disk_hits + cache.compilations for cache in caches), 8)  # every lookup is counted exactly once
+        self.assertEqual(sum(cache.compilations for cache in caches), 1)
+
+        memory_hits = caches[0].memory_hits
+        threads = [threading.Thread(target=caches[0].get_fsg_path, args=(self.grammar, None)) for _ in range(16)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertEqual(caches[0].memory_hits, memory_hits + 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+
+import collections
+import multiprocessing
+import struct
+import threading
+import time
+import unittest
+
+import speech_recognition as sr
+
+
+class FakeModel(object):
+    def __init__(self, name, load_options):
+        self.name, self.load_options = name, load_options
+        self.warmups = 0
+
+
+class RecordingModelRegistry(sr.WhisperModelRegistry):
+    """Loads fake models, whose sizes in bytes are given by ``model_sizes``, recording each load."""
+    model_sizes = {"tiny": 100, "base": 200, "small": 500}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loads = []
+
+    def _load_model(self, name, load_options):
+        time.sleep(0.05)  # give concurrent callers a chance to race
+        self.loads.append((name, load_options))
+        return FakeModel(name, load_options)
+
+    def _get_model_size(self, model):
+        return self.model_sizes[model.name]
+
+    @staticmethod
+    def _run_warmup(model):
+        model.warmups += 1
+
+
+class TestWhisperModelRegistry(unittest.TestCase):
+    def test_load_options_in_key(self):
+        registry = RecordingModelRegistry()
+        model = registry.get("base")
+        self.assertIs(registry.get("base", {}), model)
+        on_cpu = registry.get("base", {"device": "cpu", "download_root": "models"})
+        self.assertIsNot(on_cpu, model)
+        self.assertIs(registry.get("base", {"download_root": "models", "device": "cpu"}), on_cpu)  # passing options doesn't force a reload
+        self.assertEqual((registry.hits, registry.misses), (2, 2))
+
+    def test_eviction(self):
+        registry = RecordingModelRegistry(memory_budget=700)
+        tiny = registry.get("tiny")
+        registry.get("base")
+        registry.get("tiny")
+        registry.get("small")  # over budget, so the least recently used model is evicted
+        self.assertEqual(registry.memory_used, 600)
+        self.assertIs(registry.get("tiny"), tiny)
+        self.assertEqual(registry.evictions, 1)
+
+        registry = RecordingModelRegistry(max_size=1)
+        registry.get("tiny")
+        registry.get("base")
+        self.assertEqual((registry.memory_used, registry.evictions), (200, 1))
+
+        registry = RecordingModelRegistry(memory_budget=300)
+        registry.get("small")  # the most recently loaded model is kept even if it doesn't fit
+        self.assertEqual(registry.memory_used, 500)
+
+    def test_single_flight_loading(self):
+        registry, models = RecordingModelRegistry(), []
+        threads = [threading.Thread(target=lambda name=name: models.append(registry.get(name))) for name in ("base", "tiny") for _ in range(4)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertEqual(len(set(map(id, models))), 2)
+        self.assertEqual(sorted(name for name, _ in registry.loads), ["base", "tiny"])
+
+    def test_preload_and_warmup(self):
+        registry = RecordingModelRegistry()
+        model = registry.preload("base", {"device": "cpu"})
+        self.assertEqual(model.warmups, 0)
+        self.assertIs(registry.warmup("base", {"device": "cpu"}), model)
+        self.assertEqual(model.warmups, 1)
+        self.assertEqual(len(registry.loads), 1)
+
+
+def make_speech(*words, gap=0.5, word_duration=0.3):
+    """Returns 16 kHz ``AudioData`` with a burst of sound for each word in ``words`` (a non-negative integer, which sets the burst's amplitude), separated by ``gap`` seconds of silence."""
+    silence = b"\x00\x00" * int(gap * 16000)
+    return sr.AudioData(silence + b"".join(struct.pack("<2h", 1000 * (word + 1), -1000 * (word + 1)) * int(word_duration * 8000) + silence for word in words), 16000, 2, 1)
+
+
+class FakeWhisperRecognizer(sr.Recognizer):
+    """Transcribes each burst of sound made by ``make_speech`` as a segment containing the word ``wN``, where ``N`` is given by the burst's amplitude."""
+    def recognize_whisper(self, audio_data, show_dict=False, **options):
+        samples = struct.unpack("<{}h".format(len(audio_data.frame_data) // 2), audio_data.frame_data)
+        segments, start = [], None
+        for i in range(0, len(samples) - 159, 160):  # 10 millisecond frames
+            amplitude = max(samples[i:i + 160])
+            if amplitude > 0 and start is None:
+                start, word = i, amplitude // 1000 - 1
+            elif amplitude == 0 and start is not None:
+                segments.append({"start": start / 16000, "end": i / 16000, "text": " w{}".format(word)})
+                start = None
+        if start is not None: segments.append({"start": start / 16000, "end": len(samples) / 16000, "text": " w{}".format(word)})
+        result = {"text": "".join(segment["text"] for segment in segments), "segments": segments, "language": "en"}
+        return result if show_dict else result["text"]
+
+
+class TestLongFormWhisper(unittest.TestCase):
+    def test_cuts_at_pauses(self):
+        r = FakeWhisperRecognizer()
+        result = r.recognize_whisper_long(make_speech(*range(10)), max_chunk_duration=3, show_dict=True)
+        self.assertEqual(result["text"], "".join(" w{}".format(word) for word in range(10)))
+        self.assertGreater(len(result["chunks"]), 2)
+        for (_, end), (start, _) in zip(result["chunks"], result["chunks"][1:]):
+            self.assertEqual(end, start)  # no overlap is needed
+        self.assertAlmostEqual(result["segments"][7]["start"], 0.5 + 7 * 0.8, places=2)  # timestamps are relative to the whole audio
+        self.assertEqual([segment["id"] for segment in result["segments"]], list(range(10)))
+        self.assertGreater(result["real_time_factor"], 0)
+
+    def test_overlap_without_pauses(self):
+        r = FakeWhisperRecognizer()
+        r.metrics = sr.Metrics()
+        audio = make_speech(*range(12), gap=0.1)
+        result = r.recognize_whisper_long(audio, max_chunk_duration=2, overlap=0.5, show_dict=True)
+        self.assertGreater(result["chunks"][0][1], result["chunks"][1][0])  # cut without a pause, so the chunks overlap
+        self.assertEqual(result["text"], "".join(" w{}".format(word) for word in range(12)))  # words in the overlaps are only kept once
+        starts = [segment["start"] for segment in result["segments"]]
+        self.assertEqual(starts, sorted(starts))
+        self.assertIn(("real_time_factor", (("engine", "whisper"),)), r.metrics.gauges)
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "forking is not supported on this platform")
+    def test_worker_pool(self):
+        r = FakeWhisperRecognizer()
+        audio = make_speech(*range(10))
+        with sr.RecognitionWorkerPool(r, {}, worker_count=2) as pool:
+            text = r.recognize_whisper_long(audio, max_chunk_duration=3, worker_pool=pool)
+            self.assertEqual(sum(worker["jobs_completed"] for worker in pool.get_memory_usage()), len(sr.find_chunk_boundaries(audio, r.energy_threshold, 3)))
+        self.assertEqual(text, r.recognize_whisper_long(audio, max_chunk_duration=3))
+
+
+
+class CountingWhisperRecognizer(FakeWhisperRecognizer):
+    def __init__(self):
+        super().__init__()
+        self.durations = []  # duration of the audio passed to each call
+
+    def recognize_whisper(self, audio_data, show_dict=False, **options):
+        self.durations.append(len(audio_data.frame_data) / 32000)
+        return super().recognize_whisper(audio_data, show_dict, **options)
+
+
+class TestWhisperPhrasePacker(unittest.TestCase):
+    def test_packing(self):
+        r = CountingWhisperRecognizer()
+        with sr.WhisperPhrasePacker(r, max_wait=0.2, separator=0.5) as packer:
+            futures = [packer.submit(make_speech(*words)) for words in ([1, 2], [3], [4, 5, 6])]
+            self.assertEqual([future.result() for future in futures], [" w1 w2", " w3", " w4 w5 w6"])
+            self.assertEqual(len(r.durations), 1)
+            self.assertEqual((packer.packs, packer.phrases), (1, 3))
+
+            long_phrase = make_speech(*range(16), gap=1.5)  # too long to share a window with the next phrase
+            futures = [packer.submit(long_phrase), packer.submit(make_speech(7))]
+            self.assertEqual(futures[1].result(), " w7")
+            self.assertEqual(len(r.durations), 3)
+
+    def test_close_flushes(self):
+        r = CountingWhisperRecognizer()
+        packer = sr.WhisperPhrasePacker(r, max_wait=60)
+        future = packer.submit(make_speech(1))
+        packer.close()  # doesn't wait for ``max_wait`` to pass
+        self.assertEqual(future.result(timeout=0), " w1")
+        with self.assertRaises(sr.RequestError):
+            packer.submit(make_speech(1))
+
+    def test_words_split_by_timestamps(self):
+        result = {"segments": [
+            {"start": 0.0, "end": 3.0, "text": " one two three", "words": [{"start": 0.0, "end": 0.5, "word": " one"}, {"start": 0.6, "end": 1.0, "word": " two"}, {"start": 2.5, "end": 3.0, "word": " three"}]},
+            {"start": 1.2, "end": 1.4, "text": " um"},  # in the silence between phrases, closest to the first
+        ]}
+        self.assertEqual(sr.split_packed_transcription(result, [(0, 1.1), (2, 3)]), [" one two um", " three"])
+
+
+
+class PromptRecordingRecognizer(sr.Recognizer):
+    def __init__(self):
+        super().__init__()
+        self.calls = []  # language and prompt passed to each call
+
+    def recognize_whisper(self, audio_data, show_dict=False, language=None, initial_prompt=None, **options):
+        self.calls.append((language, initial_prompt))
+        result = {"text": " phrase {}.".format(len(self.calls)), "segments": [], "language": language}
+        return result if show_dict else result["text"]
+
+
+class ScriptedWhisperSession(sr.WhisperSession):
+    """Detects the languages given by ``detections``, a list of ``(language, probability)`` tuples, in order."""
+    def __init__(self, recognizer, detections, **kwargs):
+        super().__init__(recognizer, **kwargs)
+        self.scripted_detections = list(detections)
+
+    def _detect_language(self, audio_data):
+        return self.scripted_detections.pop(0)
+
+
+class TestWhisperSession(unittest.TestCase):
+    def setUp(self):
+        self.r = PromptRecordingRecognizer()
+        self.audio = make_speech(1)
+
+    def test_language_is_kept_once_confident(self):
+        detections = [("en", 0.9), ("en", 0.5), ("en", 0.95), ("fr", 0.9), ("fr", 0.85), ("fr", 0.99)]
+        session = ScriptedWhisperSession(self.r, detections, confident_phrases=3)
+        for _ in range(8): session.recognize(self.audio)
+        self.assertEqual(session.detections, 6)  # the unconfident detection and the change of language restarted the count
+        self.assertEqual(session.language, "fr")
+        self.assertEqual([language for language, _ in self.r.calls], ["en", "en", "en", "fr", "fr", "fr", "fr", "fr"])  # detection happened once per phrase, in the session
+
+        session.reset(keep_language=True)
+        session.recognize(self.audio)
+        self.assertEqual(session.detections, 6)
+        session.reset()
+        self.assertIsNone(session.language)
+
+    def test_prompt_carryover(self):
+        session = sr.WhisperSession(self.r, language="en", max_prompt_length=25, initial_prompt="Glossary: Kubernetes.")
+        for _ in range(4): session.recognize(self.audio)
+        self.assertEqual(session.detections, 0)
+        self.assertEqual([prompt for _, prompt in self.r.calls], ["Glossary: Kubernetes.", "phrase 1.", "phrase 1. phrase 2.", "1. phrase 2. phrase 3."])  # trimmed to whole words
+        session.reset()
+        session.recognize(self.audio)
+        self.assertEqual(self.r.calls[-1][1], "Glossary: Kubernetes.")
+
+
+class FakeFasterWhisperModel(object):
+    """Records the samples passed to ``transcribe``, and transcribes them as a single segment."""
+    Segment = collections.namedtuple("Segment", "id start end text avg_logprob no_speech_prob words")
+    Info = collections.namedtuple("Info", "language language_probability")
+
+    def __init__(self, name, load_options):
+        self.name, self.load_options = name, load_options
+        self.calls = []
+
+    def transcribe(self, samples, **options):
+        self.calls.append((samples, options))
+        segments = (self.Segment(0, 0.0, len(samples) / 16000, " hello", -0.2, 0.01, None) for _ in range(1))  # a generator, like faster-whisper's
+        return segments, self.Info(options["language"] or "en", 0.98)
+
+
+class FakeFasterWhisperModelRegistry(sr.FasterWhisperModelRegistry):
+    def _load_model(self, name, load_options):
+        return FakeFasterWhisperModel(name, load_options)
+
+
+class TestFasterWhisper(unittest.TestCase):
+    def test_recognize(self):
+        r = sr.Recognizer()
+        r.faster_whisper_model_registry = FakeFasterWhisperModelRegistry()
+        audio = sr.AudioData(struct.pack("<4h", 16384, -16384, 32767, 0) * 22050, 44100, 2, 2)  # one second of stereo audio
+        self.assertEqual(r.recognize_faster_whisper(audio, model="tiny", cpu_threads=2, beam_size=1), " hello")
+        result = r.recognize_faster_whisper(audio, model="tiny", cpu_threads=2, language="fr", translate=True, show_dict=True)
+        self.assertEqual((result["text"], result["language"]), (" hello", "fr"))
+        self.assertEqual(result["segments"][0]["end"], 1.0)
+
+        model = r.faster_whisper_model_registry.get("tiny", {"device": "cpu", "compute_type": "int8", "cpu_threads": 2})
+        self.assertEqual(len(model.calls), 2)  # loaded once, with the defaults filled in
+        samples, options = model.calls[1]
+        self.assertEqual((samples.dtype.name, samples.shape), ("float32", (16000,)))  # converted to 16 kHz mono, as floating point
+        self.assertTrue(all(-1 <= sample < 1 for sample in samples))
+        self.assertEqual(options, {"language": "fr", "task": "translate"})
+        self.assertEqual(model.calls[0][1]["beam_size"], 1)
+
+        r.faster_whisper_model_registry.get("tiny", {"device": "cpu", "compute_type": "int16", "cpu_threads": 2})
+        self.assertEqual(r.faster_whisper_model_registry.misses, 2)  # each compute type is a separate model
+
+        with self.assertRaises(ValueError):
+            r.recognize_faster_whisper(b"not audio data")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import multiprocessing
+import os
+import unittest
+
+import speech_recognition as sr
+
+
+class ModelRecognizer(sr.Recognizer):
+    """Recognizes audio with a large "model", which is loaded on first use and counts the bytes of audio."""
+    model_size = 32 * 1024 * 1024
+
+    def __init__(self):
+        super().__init__()
+        self.model, self.loads = None, 0
+
+    def recognize_model(self, audio_data, fail=False, crash=False):
+        if self.model is None:
+            self.model = b"\x01" * self.model_size
+            self.loads += 1
+        if crash: os._exit(3)
+        if fail or not any(audio_data.frame_data): raise sr.UnknownValueError()
+        return (len(audio_data.frame_data), os.getpid(), self.loads)
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "forking is not supported on this platform")
+class TestRecognitionWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.recognizer = ModelRecognizer()
+        self.pool = sr.RecognitionWorkerPool(self.recognizer, {"model": {}}, worker_count=2)
+        self.addCleanup(self.pool.close)
+        self.audio = sr.AudioData(b"\x01\x00" * 1600, 16000, 2, 1)
+
+    def test_shared_models(self):
+        self.assertEqual(self.recognizer.loads, 1)  # loaded once, before the workers were forked
+        futures = [self.pool.submit(self.audio, "model") for _ in range(20)]
+        results = [future.result() for future in futures]
+        self.assertEqual({(length, loads) for length, _, loads in results}, {(3200, 1)})  # the workers never loaded the model themselves
+        self.assertNotIn(os.getpid(), {pid for _, pid, _ in results})
+
+        usage = self.pool.get_memory_usage()
+        self.assertEqual(len(usage), 2)
+        self.assertEqual(sum(worker["jobs_completed"] for worker in usage), 20)
+        for worker in usage:
+            if worker["shared"] is None: continue  # memory usage isn't available on this platform
+            self.assertGreater(worker["shared"], self.recognizer.model_size)
+            self.assertLess(worker["pss"], worker["rss"] - self.recognizer.model_size // 3)
+
+    def test_segments(self):
+        silence, speech = b"\x00\x00" * 32000, b"\xff\x3f\x01\xc0" * 8000
+        segments = self.recognizer.segment(sr.AudioData(silence + speech + silence + speech + silence, 16000, 2, 1))
+        self.assertEqual(len(segments), 2)
+        self.assertIsInstance(segments[0].frame_data, memoryview)
+        results = [self.pool.recognize(segment, "model") for segment in segments]  # the views are copied when the segments are sent to the workers
+        self.assertEqual([length for length, _, _ in results], [len(segment.frame_data) for segment in segments])
+
+    def test_errors(self):
+        with self.assertRaises(sr.UnknownValueError):
+            self.pool.recognize(self.audio, "model", fail=True)
+        with self.assertRaises(sr.RequestError):
+            self.pool.recognize(self.audio, "model", crash=True)
+        self.assertEqual(self.pool.recognize(self.audio, "model")[0], 3200)  # the other worker is still running
+        self.assertEqual(len(self.pool.get_memory_usage()), 1)
+
+        with self.assertRaises(Exception):
+            self.pool.submit(self.audio, "model", fail=lambda: True)  # options that can't be pickled
+        self.assertEqual(self.pool._futures, {})
+
+        self.pool.close()
+        with self.assertRaises(sr.RequestError):
+            self.pool.submit(self.audio, "model")
+
+
+if __name__ == "__main__":
+    unittest.main()